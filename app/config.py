@@ -8,6 +8,10 @@ CLASSES_HEADERS = [
     "week_day",
     "duration_hours",
     "created_at_utc",
+    # Recurrence rule extras; appended so existing rows keep their columns
+    "interval_weeks",         # int, 1 = weekly, 2 = biweekly (blank = 1)
+    "exception_dates",        # JSON list[YYYY-MM-DD] never scheduled
+    "holiday_calendar",       # comma-separated names from the Holidays tab
 ]
 WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
 # app/config.py
@@ -19,12 +23,63 @@ SESSIONS_HEADERS = [
     "class_id",
     "class_name",
     "session_date",           # YYYY-MM-DD
-    "weekday",                # Mon/Tue... 
-    "duration",  # float (editable)
-    "rate",                   # float (editable)
-    "fee",                    # float (computed = actual_duration_hours * rate)
+    "weekday",                # Mon/Tue...
+    "planned_duration_hours",
+    "actual_duration_hours",  # editable
+    "rate",                   # editable
+    "fee",                    # computed = actual_duration_hours * rate
     "status",                 # editable (e.g., planned/done/cancel)
     "note",                   # editable
     "created_at_utc",
     "updated_at_utc",
 ]
+
+# Written by `python -m app.jobs` (see app/jobs.py); the UI only reads these
+SESSIONS_ARCHIVE_TAB = "Sessions_Archive"
+META_TAB = "Meta"
+META_HEADERS = [
+    "key",
+    "value",
+    "updated_at_utc",
+]
+# Meta key: YYYY-MM-01; months before it were moved to Sessions_Archive and
+# are never generated again nor re-rolled up from Sessions
+META_ARCHIVED_BEFORE = "archived_before"
+ROLLUPS_TAB = "Rollups"
+ROLLUPS_HEADERS = [
+    "month",                  # YYYY-MM
+    "class_id",
+    "class_name",
+    "sessions",
+    "hours",
+    "fee",                    # sum of fee (raw, thousands)
+    "updated_at_utc",
+]
+
+# Shared in-process frames (app/services/frame_store.py) are reloaded after a
+# write from this process, or after this many seconds to catch direct Sheet edits
+SHARED_FRAME_MAX_AGE_SECONDS = 300
+
+# Append-only edit log for Sessions (app/services/session_journal.py).
+# Current state = Sessions tab + replay of this tab; compaction folds it back.
+SESSIONS_JOURNAL_TAB = "Sessions_Journal"
+SESSIONS_JOURNAL_HEADERS = [
+    "session_id",
+    "field",                  # a SESSIONS_HEADERS column
+    "value",                  # new value, as text
+    "version",                # int, microseconds since epoch; replay order
+    "ts_utc",
+]
+
+# Shared holiday calendars referenced by Classes.holiday_calendar
+HOLIDAYS_TAB = "Holidays"
+HOLIDAYS_HEADERS = [
+    "calendar",
+    "date",                   # YYYY-MM-DD
+    "note",
+]
+
+# Per-rerun phase timings (app/services/profiling.py); empty path disables the log
+PROFILE_LOG_PATH = "logs/profile.log"
+PROFILE_LOG_MAX_BYTES = 1_000_000
+PROFILE_LOG_BACKUPS = 5
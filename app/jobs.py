@@ -0,0 +1,394 @@
+# app/jobs.py
+"""
+Headless batch jobs, meant for cron rather than the Streamlit request path.
+
+    python -m app.jobs materialize --from 2026-11 --to 2026-12
+    python -m app.jobs rebuild-rollups [--fix-fees]
+    python -m app.jobs archive --before 2025-01
+    python -m app.jobs verify-index
+    python -m app.jobs compact-journal
+    python -m app.jobs statements --month 2026-10 --out statements-2026-10.zip
+
+Run from the repo root so .streamlit/secrets.toml is picked up. Every
+command accepts --dry-run (read and report, write nothing); pass
+--tenant <name> (before the command) to target one branch's spreadsheet.
+"""
+import argparse
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import pandas as pd
+import pytz
+
+# Before anything builds frames; see app/services/frame_store.py
+pd.set_option("mode.copy_on_write", True)
+
+from app.config import META_ARCHIVED_BEFORE, ROLLUPS_HEADERS, SESSIONS_ARCHIVE_TAB, SESSIONS_HEADERS
+from app.repositories.classes_repo import compiled_schedules, load_classes_df
+from app.models.month_view import build_month_view
+from app.repositories.holidays_repo import holiday_calendars, load_holidays_df
+from app.repositories.journal_repo import load_journal_df
+from app.repositories.rollups_repo import load_rollups_df, overwrite_rollups_df
+from app.repositories.meta_repo import archived_before, load_meta_df, set_meta
+from app.repositories.sessions_repo import append_sessions
+from app.services.session_journal import compact, load_current_sessions, load_current_sessions_df, overwrite_and_fold
+from app.services.session_generator import (
+    existing_session_keys,
+    filter_new_sessions,
+    generate_sessions_for_month,
+)
+from app.services.statements import export_statements_zip
+from app.services.tenancy import set_tenant
+from app.utils.dates import month_bounds, month_key
+
+DEFAULT_CHUNK_SIZE = 200
+
+
+# -----------------------------
+# Timing
+# -----------------------------
+class JobStats:
+    """Wall time per phase plus free-form counters, printed at the end of a job."""
+
+    def __init__(self) -> None:
+        self.phases: dict[str, list[float]] = {}
+        self.counters: dict[str, int] = {}
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.setdefault(name, []).append(time.perf_counter() - t)
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self) -> None:
+        print("-- timings --")
+        for name, runs in self.phases.items():
+            print(f"{name:<24} calls={len(runs):<5} total={sum(runs):8.3f}s  max={max(runs):8.3f}s")
+        for name, n in self.counters.items():
+            print(f"{name:<24} {n}")
+        print(f"{'wall':<24} {time.perf_counter() - self._t0:8.3f}s")
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def _parse_month(s: str) -> date:
+    """Accepts YYYY-MM or any YYYY-MM-DD in the month."""
+    s = s.strip()
+    try:
+        d = date.fromisoformat(s if len(s) > 7 else f"{s}-01")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM, got {s!r}") from None
+    return d.replace(day=1)
+
+
+def _iter_months(first: date, last: date):
+    d = first
+    while d <= last:
+        yield d
+        _, month_last = month_bounds(d)
+        d = date.fromordinal(month_last.toordinal() + 1)
+
+
+def _iter_chunks(df: pd.DataFrame, size: int):
+    for i in range(0, len(df), size):
+        yield df.iloc[i:i + size]
+
+
+# -----------------------------
+# Commands
+# -----------------------------
+def cmd_materialize(args, stats: JobStats) -> int:
+    if args.to_month < args.from_month:
+        print("--to must be on/after --from", file=sys.stderr)
+        return 2
+
+    with stats.phase("load_classes"):
+        classes_df = load_classes_df()
+    with stats.phase("load_sessions"):
+        sessions_df = load_current_sessions_df()
+    with stats.phase("load_holidays"):
+        calendars = holiday_calendars(load_holidays_df())
+    cutoff = archived_before(load_meta_df())
+    keys = existing_session_keys(sessions_df)
+    stats.count("classes", len(classes_df))
+    stats.count("existing_sessions", len(sessions_df))
+
+    for month_first in _iter_months(args.from_month, args.to_month):
+        if cutoff is not None and month_first < cutoff:
+            # Its sessions are in Sessions_Archive; Sessions alone can't dedup them
+            print(f"{month_key(month_first)}: archived, skipped")
+            continue
+        added = 0
+        for chunk in _iter_chunks(classes_df, args.chunk_size):
+            with stats.phase("generate"):
+                planned = generate_sessions_for_month(chunk, month_first, calendars)
+                to_add = filter_new_sessions(planned, keys)
+            if to_add.empty:
+                continue
+            keys.update(zip(to_add["class_id"].astype(str), to_add["session_date"].astype(str)))
+            added += len(to_add)
+            if not args.dry_run:
+                with stats.phase("append"):
+                    append_sessions(to_add.astype(str).values.tolist())
+        stats.count("sessions_added", added)
+        print(f"{month_key(month_first)}: {added} new session(s){' (dry run)' if args.dry_run else ''}")
+    return 0
+
+
+def cmd_rebuild_rollups(args, stats: JobStats) -> int:
+    with stats.phase("load_sessions"):
+        sessions_df, journal = load_current_sessions()
+    stats.count("sessions", len(sessions_df))
+    if sessions_df.empty:
+        print("Sessions is empty; nothing to roll up.")
+        return 0
+
+    with stats.phase("recompute_fee"):
+        hours = pd.to_numeric(sessions_df["actual_duration_hours"], errors="coerce").fillna(0.0)
+        rate = pd.to_numeric(sessions_df["rate"], errors="coerce").fillna(0.0)
+        fee = hours * rate
+        stored = pd.to_numeric(sessions_df["fee"], errors="coerce").fillna(0.0)
+        stale = (fee - stored).abs() > 1e-9
+    stats.count("stale_fee_rows", int(stale.sum()))
+
+    # Rollups use the recomputed fee either way; rewriting Sessions is opt-in
+    if stale.any() and args.fix_fees and not args.dry_run:
+        fixed = sessions_df.copy()
+        fixed["fee"] = fee
+        with stats.phase("overwrite_sessions"):
+            overwrite_and_fold(fixed, journal)
+
+    with stats.phase("rollup"):
+        frame = pd.DataFrame(
+            {
+                "month": sessions_df["session_date"].astype(str).str.slice(0, 7),
+                "class_id": sessions_df["class_id"].astype(str),
+                "class_name": sessions_df["class_name"].astype(str),
+                "hours": hours,
+                "fee": fee,
+            }
+        )
+        rollups = (
+            frame.groupby(["month", "class_id", "class_name"], sort=True)
+            .agg(sessions=("hours", "size"), hours=("hours", "sum"), fee=("fee", "sum"))
+            .reset_index()
+        )
+        rollups["updated_at_utc"] = datetime.now(pytz.UTC).isoformat()
+
+        # Archived months are no longer in Sessions: keep their existing rows
+        cutoff = archived_before(load_meta_df())
+        if cutoff is not None:
+            cutoff_key = month_key(cutoff)
+            kept = load_rollups_df().reindex(columns=ROLLUPS_HEADERS, fill_value="")
+            kept = kept[kept["month"].astype(str) < cutoff_key]
+            rollups = pd.concat([kept, rollups[rollups["month"] >= cutoff_key]], ignore_index=True)
+            stats.count("archived_rollup_rows", len(kept))
+    stats.count("rollup_rows", len(rollups))
+
+    if not args.dry_run:
+        with stats.phase("write_rollups"):
+            overwrite_rollups_df(rollups)
+    fee_note = "rewritten" if args.fix_fees else "left in Sessions; pass --fix-fees to rewrite"
+    print(
+        f"{len(rollups)} rollup row(s), {int(stale.sum())} stale fee(s) {fee_note}"
+        f"{' (dry run)' if args.dry_run else ''}"
+    )
+    return 0
+
+
+def cmd_archive(args, stats: JobStats) -> int:
+    with stats.phase("load_sessions"):
+        sessions_df, journal = load_current_sessions()
+    if sessions_df.empty:
+        print("Sessions is empty; nothing to archive.")
+        return 0
+
+    session_dt = pd.to_datetime(sessions_df["session_date"], errors="coerce")
+    old = session_dt < pd.Timestamp(args.before)  # NaT compares False, so bad dates stay put
+    stats.count("archived", int(old.sum()))
+    stats.count("kept", int((~old).sum()))
+
+    if old.any() and not args.dry_run:
+        # Append to the archive first so a failure midway never loses rows
+        with stats.phase("append_archive"):
+            archived = sessions_df[old].reindex(columns=SESSIONS_HEADERS, fill_value="")
+            append_sessions(archived.astype(str).values.tolist(), tab_name=SESSIONS_ARCHIVE_TAB)
+        with stats.phase("overwrite_sessions"):
+            overwrite_and_fold(sessions_df[~old], journal)
+
+    if not args.dry_run:
+        # Never move the cutoff back: earlier months are archived already
+        cutoff = archived_before(load_meta_df())
+        if cutoff is None or args.before > cutoff:
+            set_meta(META_ARCHIVED_BEFORE, args.before.isoformat())
+
+    print(f"{int(old.sum())} session(s) before {month_key(args.before)} archived{' (dry run)' if args.dry_run else ''}")
+    return 0
+
+
+def _schedule_warnings(classes_df: pd.DataFrame, calendars) -> list[str]:
+    """Classes rows whose schedule can't be generated as written."""
+    warnings = []
+    for cid, sched in zip(classes_df.get("class_id", pd.Series(dtype=str)).astype(str), compiled_schedules(classes_df)):
+        if sched.unanchored:
+            warnings.append(f"{cid}: repeats every {sched.interval_weeks} weeks but has no start_date; no sessions generated")
+        unknown = [n for n in sched.holiday_calendars if n not in calendars.names]
+        if unknown:
+            warnings.append(f"{cid}: holiday calendar(s) not in Holidays: {', '.join(unknown)}")
+    return warnings
+
+
+def cmd_verify_index(args, stats: JobStats) -> int:
+    with stats.phase("load_classes"):
+        classes_df = load_classes_df()
+    with stats.phase("load_holidays"):
+        calendars = holiday_calendars(load_holidays_df())
+    for w in _schedule_warnings(classes_df, calendars):
+        print(f"WARN {w}")
+
+    with stats.phase("load_sessions"):
+        sessions_df = load_current_sessions_df()
+    stats.count("sessions", len(sessions_df))
+    if sessions_df.empty:
+        print("Sessions is empty.")
+        return 0
+
+    problems = []
+    with stats.phase("verify"):
+        sid = sessions_df["session_id"].astype(str)
+        if (sid.str.strip() == "").any():
+            problems.append(f"{int((sid.str.strip() == '').sum())} row(s) without session_id")
+        dup_sid = sid[sid.duplicated(keep=False) & (sid.str.strip() != "")]
+        if not dup_sid.empty:
+            problems.append(f"{dup_sid.nunique()} duplicated session_id(s), e.g. {dup_sid.iloc[0]}")
+
+        key = sessions_df["class_id"].astype(str) + "|" + sessions_df["session_date"].astype(str)
+        dup_key = key[key.duplicated(keep=False)]
+        if not dup_key.empty:
+            problems.append(f"{dup_key.nunique()} duplicated (class_id, session_date) pair(s), e.g. {dup_key.iloc[0]}")
+
+        bad_dates = pd.to_datetime(sessions_df["session_date"], errors="coerce").isna()
+        if bad_dates.any():
+            problems.append(f"{int(bad_dates.sum())} row(s) with an unparseable session_date")
+
+        known = set(classes_df["class_id"].astype(str)) if not classes_df.empty else set()
+        orphans = set(sessions_df["class_id"].astype(str)) - known
+        if orphans:
+            problems.append(f"{len(orphans)} class_id(s) not in Classes: {', '.join(sorted(orphans)[:5])}")
+
+    for p in problems:
+        print(f"FAIL {p}")
+    if not problems:
+        print("OK")
+    return 1 if problems else 0
+
+
+def cmd_compact_journal(args, stats: JobStats) -> int:
+    if args.dry_run:
+        with stats.phase("load_journal"):
+            n = len(load_journal_df())
+        print(f"{n} journal event(s) would be folded (dry run)")
+        return 0
+
+    with stats.phase("compact"):
+        n = compact()
+    stats.count("events_folded", n)
+    print(f"{n} journal event(s) folded into Sessions")
+    return 0
+
+
+def cmd_statements(args, stats: JobStats) -> int:
+    with stats.phase("load_sessions"):
+        sessions_df = load_current_sessions_df()
+    with stats.phase("month_view"):
+        view = build_month_view(sessions_df, args.month, revision=0)
+    if view.empty:
+        print(f"No sessions in {month_key(args.month)}.")
+        return 0
+    if args.dry_run:
+        print(f"{len(view.groups)} statement(s) would be written (dry run)")
+        return 0
+
+    out = args.out or f"statements-{month_key(args.month)}.zip"
+    with stats.phase("render_zip"):
+        result = export_statements_zip(view, out, workers=args.workers)
+    stats.count("statements", result.statements)
+    print(f"{out}: {result}")
+    return 0
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.jobs", description="Batch jobs for the Sessions sheet.")
+    parser.add_argument("--tenant", help="Spreadsheet from [TENANTS] in secrets (default: the default tenant).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def _common(p):
+        p.add_argument("--dry-run", action="store_true", help="Read and report only; write nothing.")
+        return p
+
+    p = _common(sub.add_parser("materialize", help="Generate planned sessions for a month range."))
+    p.add_argument("--from", dest="from_month", type=_parse_month, required=True, metavar="YYYY-MM")
+    p.add_argument("--to", dest="to_month", type=_parse_month, required=True, metavar="YYYY-MM")
+    p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Classes per generate/append batch.")
+    p.set_defaults(func=cmd_materialize)
+
+    p = _common(sub.add_parser("rebuild-rollups", help="Rebuild the per-month/class Rollups tab from recomputed fees."))
+    p.add_argument(
+        "--fix-fees",
+        action="store_true",
+        help="Also rewrite Sessions where the stored fee != hours * rate (rewrites the whole tab).",
+    )
+    p.set_defaults(func=cmd_rebuild_rollups)
+
+    p = _common(sub.add_parser("archive", help="Move sessions before a month into the archive tab."))
+    p.add_argument("--before", type=_parse_month, required=True, metavar="YYYY-MM")
+    p.set_defaults(func=cmd_archive)
+
+    p = _common(sub.add_parser("verify-index", help="Check session_id / (class_id, date) uniqueness and orphans."))
+    p.set_defaults(func=cmd_verify_index)
+
+    p = _common(sub.add_parser("statements", help="Write per-class CSV + PDF fee statements for a month into a zip."))
+    p.add_argument("--month", type=_parse_month, required=True, metavar="YYYY-MM")
+    p.add_argument("--out", help="Zip path (default: statements-YYYY-MM.zip).")
+    p.add_argument("--workers", type=int, default=None, help="Render processes (default: CPU count; 1 = in-process).")
+    p.set_defaults(func=cmd_statements)
+
+    p = _common(sub.add_parser("compact-journal", help="Fold Sessions_Journal edits into the Sessions tab."))
+    p.set_defaults(func=cmd_compact_journal)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if getattr(args, "chunk_size", 1) < 1:
+        print("--chunk-size must be >= 1", file=sys.stderr)
+        return 2
+
+    if args.tenant:
+        try:
+            set_tenant(args.tenant)
+        except KeyError as e:
+            print(e, file=sys.stderr)
+            return 2
+
+    stats = JobStats()
+    rc = args.func(args, stats)
+    stats.report()
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# app/models/class_index.py
+import re
+import unicodedata
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.utils.dates import parse_iso_date
+
+SEARCH_FIELDS = ["class_id", "class_name", "schedule"]
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+_NO_START = np.iinfo(np.int64).min
+_NO_END = np.iinfo(np.int64).max
+
+
+def fold(s: str) -> str:
+    """Lowercase and strip accents so "Toán" matches "toan"."""
+    s = str(s or "").lower().replace("đ", "d")
+    return "".join(c for c in unicodedata.normalize("NFKD", s) if not unicodedata.combining(c))
+
+
+def tokenize(s: str) -> list[str]:
+    return _TOKEN_RE.findall(fold(s))
+
+
+def _ordinals(values, missing: int) -> np.ndarray:
+    out = np.full(len(values), missing, dtype=np.int64)
+    for i, v in enumerate(values):
+        d = parse_iso_date(str(v or ""))
+        if d:
+            out[i] = d.toordinal()
+    return out
+
+
+@dataclass(frozen=True)
+class ClassIndex:
+    """
+    Prebuilt search over the Classes frame: a sorted token vocabulary with
+    postings (row positions) for prefix/token matching, plus start/end
+    ordinals for vectorized active/ended filters. Built once per Classes
+    revision; queries return row positions into `df`.
+    """
+    df: pd.DataFrame
+    vocab: list[str]                    # sorted unique tokens
+    postings: list[np.ndarray]          # aligned with vocab
+    start_ord: np.ndarray
+    end_ord: np.ndarray
+
+    @staticmethod
+    def build(df: pd.DataFrame) -> "ClassIndex":
+        src = df.reindex(columns=SEARCH_FIELDS, fill_value="")
+        acc: dict[str, set[int]] = {}
+        for pos, row in enumerate(src.itertuples(index=False, name=None)):
+            for tok in tokenize(" ".join(str(v) for v in row)):
+                acc.setdefault(tok, set()).add(pos)
+
+        vocab = sorted(acc)
+        dates = df.reindex(columns=["start_date", "end_date"], fill_value="")
+        return ClassIndex(
+            df=df,
+            vocab=vocab,
+            postings=[np.fromiter(sorted(acc[t]), dtype=np.int64) for t in vocab],
+            start_ord=_ordinals(dates["start_date"].tolist(), _NO_START),
+            end_ord=_ordinals(dates["end_date"].tolist(), _NO_END),
+        )
+
+    def _prefix_rows(self, prefix: str) -> np.ndarray:
+        i = bisect_left(self.vocab, prefix)
+        hits = []
+        while i < len(self.vocab) and self.vocab[i].startswith(prefix):
+            hits.append(self.postings[i])
+            i += 1
+        if not hits:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(hits)) if len(hits) > 1 else hits[0]
+
+    def search(
+        self,
+        query: str = "",
+        status: str = "All",
+        active_from: Optional[date] = None,
+        active_to: Optional[date] = None,
+        today: Optional[date] = None,
+    ) -> np.ndarray:
+        """
+        Row positions matching every query token (as a token prefix), the
+        status ("All" / "Active" / "Ended", as of `today`) and, if given,
+        running at some point in [active_from, active_to].
+        """
+        mask = np.ones(len(self.df), dtype=bool)
+
+        for tok in tokenize(query):
+            hit = np.zeros(len(self.df), dtype=bool)
+            hit[self._prefix_rows(tok)] = True
+            mask &= hit
+            if not mask.any():
+                return np.empty(0, dtype=np.int64)
+
+        t = (today or date.today()).toordinal()
+        if status == "Active":
+            mask &= (self.start_ord <= t) & (self.end_ord >= t)
+        elif status == "Ended":
+            mask &= self.end_ord < t
+
+        if active_from is not None:
+            mask &= self.end_ord >= active_from.toordinal()
+        if active_to is not None:
+            mask &= self.start_ord <= active_to.toordinal()
+
+        return np.flatnonzero(mask)
+
+    def page(self, positions: np.ndarray, page: int, page_size: int, columns: list[str]) -> pd.DataFrame:
+        """Only the rows for one page (1-based), restricted to `columns` that exist."""
+        start = max(0, (page - 1) * page_size)
+        cols = [c for c in columns if c in self.df.columns] or list(self.df.columns)
+        return self.df.iloc[positions[start:start + page_size]][cols]
@@ -16,6 +16,9 @@ class Classes:
     week_day: str                # JSON list[str]
     duration_hours: str          # JSON list[float], aligned with week_day
     created_at_utc: str
+    interval_weeks: str = "1"    # repeat every N weeks
+    exception_dates: str = "[]"  # JSON list[str] YYYY-MM-DD
+    holiday_calendar: str = ""   # comma-separated Holidays tab calendar names
 
     @staticmethod
     def create(
@@ -27,6 +30,9 @@ class Classes:
     end_date: Optional[date],
     week_day: list[str],
     duration_hours: list[float],
+    interval_weeks: int = 1,
+    exception_dates: Optional[list[date]] = None,
+    holiday_calendar: str = "",
 ) -> "Classes":
         now_utc = datetime.now(pytz.UTC).isoformat()
         return Classes(
@@ -38,4 +44,7 @@ class Classes:
             week_day=json.dumps(week_day, ensure_ascii=False),
             duration_hours=json.dumps(duration_hours, ensure_ascii=False),
             created_at_utc=now_utc,
+            interval_weeks=str(int(interval_weeks)),
+            exception_dates=json.dumps([d.isoformat() for d in (exception_dates or [])]),
+            holiday_calendar=holiday_calendar.strip(),
         )
\ No newline at end of file
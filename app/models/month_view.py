@@ -0,0 +1,100 @@
+# app/models/month_view.py
+from dataclasses import dataclass, field
+from datetime import date
+
+import pandas as pd
+
+from app.utils.dates import month_bounds, month_key
+
+# Columns shown in each per-class editor (session_id stays hidden)
+EDITOR_COLS = ["session_date", "weekday", "actual_duration_hours", "rate", "fee_display", "status", "note"]
+
+
+def format_fee(fee_raw: float) -> str:
+    """Scalar twin of format_fee_display."""
+    return f"{int(round(float(fee_raw) * 1000)):,}"
+
+
+def format_fee_display(fee_raw_series: pd.Series) -> pd.Series:
+    """fee_raw is in thousands of VND; display as whole VND with commas."""
+    fee_vnd = (pd.to_numeric(fee_raw_series, errors="coerce").fillna(0.0) * 1000).round(0).astype(int)
+    return fee_vnd.map(lambda x: f"{x:,}")
+
+
+@dataclass(frozen=True)
+class ClassGroup:
+    class_id: str
+    class_name: str
+    session_ids: list[str]
+    editor_df: pd.DataFrame      # EDITOR_COLS only, ready for st.data_editor
+    sessions: int
+    hours: float
+    fee_raw: float
+
+
+@dataclass(frozen=True)
+class MonthView:
+    """
+    Everything the Monthly Sessions tab renders for one month, derived once
+    from the full Sessions frame. Keyed by (month_key, revision): the caller
+    bumps the revision whenever Sessions is reloaded, and reuses the view
+    otherwise.
+    """
+    month_key: str
+    revision: int
+    frame: pd.DataFrame          # month slice with normalized types + fee columns
+    groups: list[ClassGroup] = field(default_factory=list)  # per-class subtotals; the UI sums edited ones
+
+    @property
+    def key(self) -> tuple[str, int]:
+        return (self.month_key, self.revision)
+
+    @property
+    def empty(self) -> bool:
+        return self.frame.empty
+
+
+def build_month_view(sessions_df: pd.DataFrame, month_first: date, revision: int) -> MonthView:
+    first, last = month_bounds(month_first)
+
+    if sessions_df.empty or "session_date" not in sessions_df.columns:
+        return MonthView(month_key(month_first), revision, sessions_df.iloc[0:0].copy())
+
+    session_dt = pd.to_datetime(sessions_df["session_date"], errors="coerce")
+    in_month = (session_dt >= pd.Timestamp(first)) & (session_dt <= pd.Timestamp(last))
+    month_df = sessions_df[in_month].copy()
+
+    if month_df.empty or "session_id" not in month_df.columns:
+        # Caller reports the missing session_id column
+        return MonthView(month_key(month_first), revision, month_df)
+
+    # Normalize types for editor
+    month_df["actual_duration_hours"] = pd.to_numeric(month_df["actual_duration_hours"], errors="coerce").fillna(0.0)
+    month_df["rate"] = pd.to_numeric(month_df["rate"], errors="coerce").fillna(0.0)
+    month_df["session_date"] = session_dt[in_month].dt.date
+    month_df["session_id"] = month_df["session_id"].astype(str)
+
+    # Compute fee display (fee_raw * 1000 with commas)
+    month_df["fee_raw"] = month_df["actual_duration_hours"] * month_df["rate"]
+    month_df["fee_display"] = format_fee_display(month_df["fee_raw"])
+
+    groups = []
+    for (cid, cname), g in month_df.groupby(["class_id", "class_name"], sort=True):
+        groups.append(
+            ClassGroup(
+                class_id=str(cid),
+                class_name=str(cname),
+                session_ids=g["session_id"].tolist(),
+                editor_df=g[EDITOR_COLS].reset_index(drop=True),
+                sessions=int(len(g)),
+                hours=float(g["actual_duration_hours"].sum()),
+                fee_raw=float(g["fee_raw"].sum()),
+            )
+        )
+
+    return MonthView(
+        month_key=month_key(month_first),
+        revision=revision,
+        frame=month_df,
+        groups=groups,
+    )
@@ -0,0 +1,281 @@
+# app/models/schedule.py
+import hashlib
+import json
+import threading
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Iterable, Mapping, Optional
+
+import numpy as np
+
+from app.config import WEEKDAYS
+from app.utils.dates import parse_iso_date
+
+_WEEKDAY_TO_INT = {d: i for i, d in enumerate(WEEKDAYS)}
+
+_EMPTY_ORDS = np.empty(0, dtype=np.int64)
+_EMPTY_DURS = np.empty(0, dtype=np.float64)
+
+
+# -----------------------------
+# Compiled schedule (recurrence rule + occurrence index)
+# -----------------------------
+@dataclass(frozen=True)
+class CompiledSchedule:
+    """
+    A class's recurrence rule: weekly slots, repeated every `interval_weeks`
+    weeks counted from the week of start_date, minus its own exception dates
+    and the dates of its holiday calendar(s). An every-N-weeks rule without a
+    start_date has no anchor week and yields no occurrences.
+
+    Occurrences are materialized lazily into a sorted per-year index of date
+    ordinals, so a [from, to] query is two searchsorted calls. Holidays are
+    shared and change independently of the class, so they are masked out at
+    query time rather than baked into the index.
+    """
+    durations: tuple[float, ...]  # 7 slots, Mon..Sun; 0.0 = no session that day
+    start_ord: Optional[int]      # date.toordinal() of start_date, None = open
+    end_ord: Optional[int]        # date.toordinal() of end_date, None = open
+    display: str                  # "Mon:1.5h, Wed:2h" for the Classes table
+    interval_weeks: int = 1       # 1 = weekly, 2 = biweekly, ...
+    excluded: frozenset = frozenset()  # per-class exception date ordinals
+    holiday_calendars: tuple[str, ...] = ()  # names in the Holidays tab
+    _index: dict = field(default_factory=dict, compare=False, repr=False)  # year -> (ords, durs)
+
+    @property
+    def empty(self) -> bool:
+        return not any(d > 0 for d in self.durations)
+
+    @property
+    def unanchored(self) -> bool:
+        """Repeats every 2+ weeks but has no start_date to count the weeks from."""
+        return self.interval_weeks > 1 and self.start_ord is None
+
+    def _year_index(self, year: int) -> tuple[np.ndarray, np.ndarray]:
+        hit = self._index.get(year)
+        if hit is not None:
+            return hit
+
+        lo = date(year, 1, 1).toordinal()
+        hi = date(year, 12, 31).toordinal()
+        if self.start_ord is not None:
+            lo = max(lo, self.start_ord)
+        if self.end_ord is not None:
+            hi = min(hi, self.end_ord)
+
+        if lo > hi or self.empty or self.unanchored:
+            built = (_EMPTY_ORDS, _EMPTY_DURS)
+        else:
+            ords = np.arange(lo, hi + 1, dtype=np.int64)
+            # date.fromordinal(1) is a Monday
+            durs = np.asarray(self.durations, dtype=np.float64)[(ords - 1) % 7]
+            mask = durs > 0
+            if self.interval_weeks > 1:
+                anchor_monday = self.start_ord - (self.start_ord - 1) % 7
+                mask &= ((ords - anchor_monday) // 7) % self.interval_weeks == 0
+            if self.excluded:
+                mask &= ~np.isin(ords, np.fromiter(self.excluded, dtype=np.int64))
+            built = (ords[mask], durs[mask])
+
+        self._index[year] = built
+        return built
+
+    def occurrence_arrays(
+        self, first: date, last: date, calendars: "HolidayCalendars" = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """(ordinals, planned hours) for every occurrence in [first, last], holidays excluded."""
+        lo, hi = first.toordinal(), last.toordinal()
+        parts_o, parts_d = [], []
+        for year in range(first.year, last.year + 1):
+            ords, durs = self._year_index(year)
+            i = np.searchsorted(ords, lo, side="left")
+            j = np.searchsorted(ords, hi, side="right")
+            if j > i:
+                parts_o.append(ords[i:j])
+                parts_d.append(durs[i:j])
+        if not parts_o:
+            return _EMPTY_ORDS, _EMPTY_DURS
+        ords, durs = np.concatenate(parts_o), np.concatenate(parts_d)
+
+        if calendars is not None and self.holiday_calendars:
+            keep = ~np.isin(ords, calendars.ordinals(self.holiday_calendars))
+            ords, durs = ords[keep], durs[keep]
+        return ords, durs
+
+    def occurrences(
+        self, first: date, last: date, calendars: "HolidayCalendars" = None
+    ) -> list[tuple[date, float]]:
+        """(date, planned hours) for every scheduled day in [first, last]."""
+        ords, durs = self.occurrence_arrays(first, last, calendars)
+        return [(date.fromordinal(int(o)), float(d)) for o, d in zip(ords, durs)]
+
+
+def _loads_list(s) -> list:
+    v = json.loads(s or "[]")
+    return v if isinstance(v, list) else []
+
+
+def _parse_interval(x) -> int:
+    try:
+        n = int(float(str(x).strip() or 1))
+    except Exception:
+        return 1
+    return n if n >= 1 else 1
+
+
+def _parse_exception_ords(x) -> set[int]:
+    """Accepts a JSON list of YYYY-MM-DD or a comma-separated string."""
+    s = str(x or "").strip()
+    if not s:
+        return set()
+    try:
+        items = _loads_list(s)
+    except Exception:
+        items = s.split(",")
+    out = set()
+    for item in items:
+        d = parse_iso_date(str(item))
+        if d:
+            out.add(d.toordinal())
+    return out
+
+
+def compile_schedule(
+    week_day,
+    duration_hours,
+    start_date="",
+    end_date="",
+    interval_weeks=1,
+    exception_dates="",
+    holiday_calendar="",
+) -> CompiledSchedule:
+    """
+    Decode the Classes row's JSON week_day/duration_hours once. Bad JSON
+    yields an empty schedule rather than raising, like the old per-row parsers.
+    """
+    try:
+        days = _loads_list(week_day)
+    except Exception:
+        days = []
+    try:
+        durs = _loads_list(duration_hours)
+    except Exception:
+        durs = []
+
+    slots = [0.0] * 7
+    for dname, dur in zip(days, durs):
+        if dname in _WEEKDAY_TO_INT:
+            try:
+                slots[_WEEKDAY_TO_INT[dname]] = float(dur)
+            except Exception:
+                slots[_WEEKDAY_TO_INT[dname]] = 0.0
+
+    sd = parse_iso_date(str(start_date or ""))
+    ed = parse_iso_date(str(end_date or ""))
+    interval = _parse_interval(interval_weeks)
+
+    display = ", ".join(f"{d}:{h}h" for d, h in zip(days, durs))
+    if display and interval > 1:
+        display += f" (every {interval} weeks)" if sd else f" (every {interval} weeks; needs a start date)"
+
+    return CompiledSchedule(
+        durations=tuple(slots),
+        start_ord=sd.toordinal() if sd else None,
+        end_ord=ed.toordinal() if ed else None,
+        display=display,
+        interval_weeks=interval,
+        excluded=frozenset(_parse_exception_ords(exception_dates)),
+        holiday_calendars=tuple(n.strip() for n in str(holiday_calendar or "").split(",") if n.strip()),
+    )
+
+
+# -----------------------------
+# Holiday calendars (shared by many classes)
+# -----------------------------
+class HolidayCalendars:
+    """Named sets of holiday dates from the Holidays tab, as sorted ordinal arrays."""
+
+    def __init__(self, dates: Mapping[str, np.ndarray]) -> None:
+        self._dates = dict(dates)
+
+    @staticmethod
+    def build(pairs: Iterable[tuple[str, str]]) -> "HolidayCalendars":
+        """pairs: (calendar name, YYYY-MM-DD) rows from the Holidays tab."""
+        acc: dict[str, set[int]] = {}
+        for name, d in pairs:
+            name = str(name or "").strip()
+            parsed = parse_iso_date(str(d or ""))
+            if name and parsed:
+                acc.setdefault(name, set()).add(parsed.toordinal())
+        return HolidayCalendars({k: np.array(sorted(v), dtype=np.int64) for k, v in acc.items()})
+
+    @property
+    def names(self) -> frozenset:
+        return frozenset(self._dates)
+
+    def ordinals(self, names: Iterable[str]) -> np.ndarray:
+        parts = [self._dates[n] for n in names if n in self._dates]
+        if not parts:
+            return _EMPTY_ORDS
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+NO_HOLIDAYS = HolidayCalendars({})
+
+
+# -----------------------------
+# Process-wide cache: class_id -> (content hash, CompiledSchedule)
+# -----------------------------
+_CACHE: dict[str, tuple[str, CompiledSchedule]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def _content_hash(*parts) -> str:
+    raw = "\x1f".join("" if p is None else str(p) for p in parts)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def get_compiled_schedule(
+    class_id,
+    week_day,
+    duration_hours,
+    start_date="",
+    end_date="",
+    interval_weeks=1,
+    exception_dates="",
+    holiday_calendar="",
+    namespace: str = "",
+) -> CompiledSchedule:
+    """
+    Cached compile_schedule. A changed Classes row hashes differently and is
+    recompiled; an unchanged one is a dict lookup and keeps its occurrence index.
+    `namespace` separates tenants whose class_ids overlap.
+    """
+    h = _content_hash(week_day, duration_hours, start_date, end_date, interval_weeks, exception_dates, holiday_calendar)
+    key = f"{namespace}:{class_id}" if class_id else ""
+    hit = _CACHE.get(key)
+    if hit is not None and hit[0] == h:
+        return hit[1]
+
+    compiled = compile_schedule(week_day, duration_hours, start_date, end_date, interval_weeks, exception_dates, holiday_calendar)
+    if key:
+        with _CACHE_LOCK:
+            _CACHE[key] = (h, compiled)
+    return compiled
+
+
+def prune_schedule_cache(live_class_ids: Iterable[str], namespace: str = "") -> None:
+    """Drop entries for classes no longer present in the namespace's Classes sheet."""
+    prefix = f"{namespace}:"
+    live = {prefix + str(c) for c in live_class_ids}
+    with _CACHE_LOCK:
+        for k in [k for k in _CACHE if k.startswith(prefix) and k not in live]:
+            del _CACHE[k]
+
+
+def invalidate_schedule_cache(class_id: Optional[str] = None, namespace: str = "") -> None:
+    with _CACHE_LOCK:
+        if class_id is None:
+            _CACHE.clear()
+        else:
+            _CACHE.pop(f"{namespace}:{class_id}", None)
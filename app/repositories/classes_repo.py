@@ -1,42 +1,28 @@
-import json
 import pandas as pd
 import gspread
 from gspread.exceptions import WorksheetNotFound, APIError
 from dataclasses import asdict
 from app.services.gsheets_client import get_spreadsheet
+from app.services.tenancy import current_tenant
+from app.services.sheets_schema import get_worksheet, verify_headers, schema_retry
+from app.services.profiling import timed
 from app.models.classes import Classes
 from app.config import CLASSES_HEADERS, CLASSES_TAB
 from app.utils.rate_parser import parse_rate_expr
-import streamlit as st
+from app.models.schedule import CompiledSchedule, get_compiled_schedule, prune_schedule_cache
 # -----------------------------
 # Sheet helpers for Classes
 
 def get_or_create_worksheet(sh, tab_name: str):
     """
-    Cached per Streamlit session to avoid repeated fetch_sheet_metadata calls.
+    Cached per process (see app/services/sheets_schema.py): all tabs come
+    from a single fetch_sheet_metadata call at bootstrap.
     """
-    cache = st.session_state.setdefault("_ws_cache", {})
-
-    # Key by spreadsheet id + tab name
-    key = (sh.id, tab_name)
-    if key in cache:
-        return cache[key]
-
-    try:
-        ws = sh.worksheet(tab_name)  # this triggers metadata read (expensive)
-    except WorksheetNotFound:
-        ws = sh.add_worksheet(title=tab_name, rows=1000, cols=50)
-
-    cache[key] = ws
-    return ws
+    return get_worksheet(sh, tab_name)
 
 def ensure_headers(ws, headers):
-    values = ws.get_all_values()
-    if not values:
-        ws.update("A1", [headers])
-        return
-    if values[0] != headers:
-        ws.update("A1", [headers])
+    # Row 1 is checked once per process (batched at bootstrap), not per call
+    verify_headers(ws.spreadsheet, ws.title, headers)
 
 def _parse_mct_id(s: str, prefix: str) -> int | None:
     # Accepts e.g. MCT001, MCT12, MCT0007
@@ -78,6 +64,24 @@ def append_class_to_sheet(new_class: Classes):
     row = [row_dict.get(h, "") for h in CLASSES_HEADERS]
     ws.append_row(row, value_input_option="RAW")
 
+def compiled_schedules(classes_df: pd.DataFrame) -> list[CompiledSchedule]:
+    """One CompiledSchedule per Classes row, served from the process cache when unchanged."""
+    cols = [
+        "class_id",
+        "week_day",
+        "duration_hours",
+        "start_date",
+        "end_date",
+        "interval_weeks",
+        "exception_dates",
+        "holiday_calendar",
+    ]
+    src = classes_df.reindex(columns=cols, fill_value="")
+    ns = current_tenant()
+    return [get_compiled_schedule(*row, namespace=ns) for row in src.itertuples(index=False, name=None)]
+
+@timed("sheets.load_classes")
+@schema_retry
 def load_classes_df() -> pd.DataFrame:
     sh = get_spreadsheet()
     ws = get_or_create_worksheet(sh, CLASSES_TAB)
@@ -102,16 +106,10 @@ def load_classes_df() -> pd.DataFrame:
                 return None
 
     df["rate_value"] = df["rate"].apply(_to_rate_value)
-    # Pretty display: decode and merge weekdays+durations
+    # Pretty display from the compiled schedule (shared with session generation)
     if not df.empty:
-        def _pretty_row(r):
-            try:
-                days = json.loads(r.get("week_day", "[]") or "[]")
-                durs = json.loads(r.get("duration_hours", "[]") or "[]")
-                pairs = [f"{d}:{h}h" for d, h in zip(days, durs)]
-                return ", ".join(pairs)
-            except Exception:
-                return ""
-        df["schedule"] = df.apply(_pretty_row, axis=1)
+        compiled = compiled_schedules(df)
+        df["schedule"] = [c.display for c in compiled]
+        prune_schedule_cache(df["class_id"].astype(str), namespace=current_tenant())
 
     return df
\ No newline at end of file
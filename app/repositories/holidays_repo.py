@@ -0,0 +1,27 @@
+# app/repositories/holidays_repo.py
+import pandas as pd
+
+from app.services.gsheets_client import get_spreadsheet
+from app.repositories.classes_repo import get_or_create_worksheet, ensure_headers
+from app.services.sheets_schema import schema_retry
+from app.services.profiling import timed
+from app.models.schedule import HolidayCalendars
+from app.config import HOLIDAYS_TAB, HOLIDAYS_HEADERS
+
+
+@timed("sheets.load_holidays")
+@schema_retry
+def load_holidays_df() -> pd.DataFrame:
+    sh = get_spreadsheet()
+    ws = get_or_create_worksheet(sh, HOLIDAYS_TAB)
+    ensure_headers(ws, HOLIDAYS_HEADERS)
+
+    records = ws.get_all_records()
+    return pd.DataFrame(records) if records else pd.DataFrame(columns=HOLIDAYS_HEADERS)
+
+
+def holiday_calendars(holidays_df: pd.DataFrame) -> HolidayCalendars:
+    if holidays_df.empty:
+        return HolidayCalendars({})
+    src = holidays_df.reindex(columns=["calendar", "date"], fill_value="")
+    return HolidayCalendars.build(src.itertuples(index=False, name=None))
@@ -0,0 +1,60 @@
+# app/repositories/journal_repo.py
+import pandas as pd
+from gspread.utils import rowcol_to_a1
+
+from app.services.gsheets_client import get_spreadsheet
+from app.repositories.classes_repo import get_or_create_worksheet, ensure_headers
+from app.services.sheets_schema import schema_retry
+from app.services.profiling import timed
+from app.config import SESSIONS_JOURNAL_TAB, SESSIONS_JOURNAL_HEADERS
+
+
+@timed("sheets.load_journal")
+@schema_retry
+def load_journal_df() -> pd.DataFrame:
+    sh = get_spreadsheet()
+    ws = get_or_create_worksheet(sh, SESSIONS_JOURNAL_TAB)
+    ensure_headers(ws, SESSIONS_JOURNAL_HEADERS)
+
+    # Raw strings: values must replay exactly as written
+    values = ws.get_all_values()
+    if len(values) <= 1:
+        return pd.DataFrame(columns=SESSIONS_JOURNAL_HEADERS)
+    return pd.DataFrame(values[1:], columns=values[0]).reindex(columns=SESSIONS_JOURNAL_HEADERS, fill_value="")
+
+
+def append_journal(rows: list[list]) -> None:
+    if not rows:
+        return
+    sh = get_spreadsheet()
+    ws = get_or_create_worksheet(sh, SESSIONS_JOURNAL_TAB)
+    ensure_headers(ws, SESSIONS_JOURNAL_HEADERS)
+    ws.append_rows(rows, value_input_option="RAW")
+
+
+def clear_journal(folded: pd.DataFrame) -> int:
+    """
+    Delete the events in `folded` (a load_journal_df() result) and nothing else.
+
+    They are the first len(folded) data rows, since appends only ever land
+    after them, so rows appended after the read survive. If the head of the tab
+    no longer matches (another compaction got there first), nothing is deleted:
+    leftover events replay to values the base already has. Returns rows deleted.
+    """
+    n = len(folded)
+    if n == 0:
+        return 0
+    sh = get_spreadsheet()
+    ws = get_or_create_worksheet(sh, SESSIONS_JOURNAL_TAB)
+    width = len(SESSIONS_JOURNAL_HEADERS)
+    last_col = rowcol_to_a1(1, width).rstrip("0123456789")
+
+    # Identify events by (session_id, field, version)
+    head = [(list(r) + [""] * width)[:width] for r in ws.get(f"A2:{last_col}{n + 1}")]
+    expected = folded[["session_id", "field", "version"]].astype(str).values.tolist()
+    if [[r[0], r[1], r[3]] for r in head] != expected:
+        return 0
+
+    # Keep row 1: the header check is cached per process and won't re-run
+    ws.delete_rows(2, n + 1)
+    return n
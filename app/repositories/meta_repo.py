@@ -0,0 +1,51 @@
+# app/repositories/meta_repo.py
+from datetime import date, datetime
+from typing import Optional
+
+import pandas as pd
+import pytz
+
+from app.services.gsheets_client import get_spreadsheet
+from app.repositories.classes_repo import get_or_create_worksheet, ensure_headers
+from app.services.sheets_schema import schema_retry
+from app.services.profiling import timed
+from app.config import META_ARCHIVED_BEFORE, META_HEADERS, META_TAB
+from app.utils.dates import parse_iso_date
+
+
+@timed("sheets.load_meta")
+@schema_retry
+def load_meta_df() -> pd.DataFrame:
+    sh = get_spreadsheet()
+    ws = get_or_create_worksheet(sh, META_TAB)
+    ensure_headers(ws, META_HEADERS)
+
+    values = ws.get_all_values()
+    if len(values) <= 1:
+        return pd.DataFrame(columns=META_HEADERS)
+    return pd.DataFrame(values[1:], columns=values[0]).reindex(columns=META_HEADERS, fill_value="")
+
+
+def get_meta(meta_df: pd.DataFrame, key: str) -> str:
+    hit = meta_df.loc[meta_df["key"].astype(str) == key, "value"]
+    return str(hit.iloc[-1]) if not hit.empty else ""
+
+
+def set_meta(key: str, value: str) -> None:
+    """Upsert one key (jobs only; the UI reads)."""
+    sh = get_spreadsheet()
+    ws = get_or_create_worksheet(sh, META_TAB)
+    ensure_headers(ws, META_HEADERS)
+
+    row = [key, value, datetime.now(pytz.UTC).isoformat()]
+    keys = ws.col_values(1)[1:]
+    if key in keys:
+        r = keys.index(key) + 2
+        ws.update(f"A{r}:C{r}", [row], value_input_option="RAW")
+    else:
+        ws.append_rows([row], value_input_option="RAW")
+
+
+def archived_before(meta_df: pd.DataFrame) -> Optional[date]:
+    """First month still in Sessions after `python -m app.jobs archive`, or None."""
+    return parse_iso_date(get_meta(meta_df, META_ARCHIVED_BEFORE))
@@ -0,0 +1,29 @@
+# app/repositories/rollups_repo.py
+import pandas as pd
+
+from app.services.gsheets_client import get_spreadsheet
+from app.repositories.classes_repo import get_or_create_worksheet, ensure_headers
+from app.services.sheets_schema import schema_retry
+from app.services.profiling import timed
+from app.config import ROLLUPS_TAB, ROLLUPS_HEADERS
+
+
+@timed("sheets.load_rollups")
+@schema_retry
+def load_rollups_df() -> pd.DataFrame:
+    sh = get_spreadsheet()
+    ws = get_or_create_worksheet(sh, ROLLUPS_TAB)
+    ensure_headers(ws, ROLLUPS_HEADERS)
+
+    records = ws.get_all_records()
+    return pd.DataFrame(records) if records else pd.DataFrame(columns=ROLLUPS_HEADERS)
+
+
+def overwrite_rollups_df(df: pd.DataFrame) -> None:
+    sh = get_spreadsheet()
+    ws = get_or_create_worksheet(sh, ROLLUPS_TAB)
+
+    df = df.reindex(columns=ROLLUPS_HEADERS, fill_value="")
+    values = [ROLLUPS_HEADERS] + df.astype(str).values.tolist()
+    ws.clear()
+    ws.update("A1", values)
@@ -1,18 +1,18 @@
 # app/repositories/sessions_repo.py
 import pandas as pd
-import pytz
-from datetime import datetime
-from dataclasses import asdict
-from typing import Iterable
 
 from app.services.gsheets_client import get_spreadsheet
 from app.repositories.classes_repo import get_or_create_worksheet, ensure_headers
+from app.services.sheets_schema import schema_retry
+from app.services.profiling import timed
 from app.config import SESSIONS_TAB, SESSIONS_HEADERS
 
 
-def load_sessions_df() -> pd.DataFrame:
+@timed("sheets.load_sessions")
+@schema_retry
+def load_sessions_df(tab_name: str = SESSIONS_TAB) -> pd.DataFrame:
     sh = get_spreadsheet()
-    ws = get_or_create_worksheet(sh, SESSIONS_TAB)
+    ws = get_or_create_worksheet(sh, tab_name)
     ensure_headers(ws, SESSIONS_HEADERS)
 
     records = ws.get_all_records()
@@ -20,30 +20,27 @@ def load_sessions_df() -> pd.DataFrame:
     return df
 
 
-def append_sessions(rows: list[list]):
+def append_sessions(rows: list[list], tab_name: str = SESSIONS_TAB) -> None:
+    if not rows:
+        return
     sh = get_spreadsheet()
-    ws = get_or_create_worksheet(sh, SESSIONS_TAB)
+    ws = get_or_create_worksheet(sh, tab_name)
     ensure_headers(ws, SESSIONS_HEADERS)
+    ws.append_rows(rows, value_input_option="RAW")
 
-    if rows:
-        ws.append_rows(rows, value_input_option="RAW")
 
-
-def overwrite_sessions_df(df_all: pd.DataFrame) -> None:
+def overwrite_sessions_df(df_all: pd.DataFrame, tab_name: str = SESSIONS_TAB) -> None:
     """
     Simple + reliable approach: rewrite the whole Sessions sheet.
     Fine for small/medium datasets.
     """
     sh = get_spreadsheet()
-    ws = get_or_create_worksheet(sh, SESSIONS_TAB)
+    ws = get_or_create_worksheet(sh, tab_name)
     ensure_headers(ws, SESSIONS_HEADERS)
 
-    df_all = df_all.copy()
-    # Ensure all columns exist + ordered
-    for c in SESSIONS_HEADERS:
-        if c not in df_all.columns:
-            df_all[c] = ""
-    df_all = df_all[SESSIONS_HEADERS]
+    # Ensure all columns exist + ordered (reindex builds a new frame; the
+    # caller's, possibly shared, frame is left untouched)
+    df_all = df_all.reindex(columns=SESSIONS_HEADERS, fill_value="")
 
     values = [SESSIONS_HEADERS] + df_all.astype(str).values.tolist()
     ws.clear()
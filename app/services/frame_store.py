@@ -0,0 +1,154 @@
+# app/services/frame_store.py
+"""
+Process-wide, read-only DataFrames shared by every browser session.
+
+Sessions keep references to the frames held here instead of loading their own
+copies, so RAM no longer grows with users x history. Frames must be treated
+as immutable: pandas copy-on-write (enabled at startup by streamlit_app.py
+and app/jobs.py) makes any derived frame
+copy only the columns it actually modifies, and apply_overlay() is how
+per-session edits are layered on top of a shared frame.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Mapping, Optional
+
+import pandas as pd
+
+from app.config import SHARED_FRAME_MAX_AGE_SECONDS
+
+CLASSES_FRAME = "classes"
+SESSIONS_FRAME = "sessions"
+HOLIDAYS_FRAME = "holidays"
+META_FRAME = "meta"
+
+
+@dataclass(frozen=True)
+class SharedFrame:
+    name: str
+    revision: int
+    df: pd.DataFrame
+    loaded_at: float
+
+
+class FrameStore:
+    """
+    One SharedFrame per name, reloaded when invalidated (after a write) or
+    older than max_age_seconds (to pick up edits made directly in Sheets).
+    Values derived from a frame (e.g. a MonthView) are cached per revision.
+    """
+
+    def __init__(self, max_age_seconds: Optional[float] = None) -> None:
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self._frames: dict[str, SharedFrame] = {}
+        self._revisions: dict[str, int] = {}
+        self._derived: dict[tuple, Any] = {}
+
+    def _fresh(self, sf: Optional[SharedFrame]) -> bool:
+        if sf is None:
+            return False
+        if self.max_age_seconds is None:
+            return True
+        return (time.monotonic() - sf.loaded_at) < self.max_age_seconds
+
+    def get(self, name: str, loader: Callable[[], pd.DataFrame]) -> SharedFrame:
+        sf = self._frames.get(name)
+        if self._fresh(sf):
+            return sf
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # One loader per name at a time; late arrivals reuse the winner's frame
+        with load_lock:
+            sf = self._frames.get(name)
+            if self._fresh(sf):
+                return sf
+
+            df = loader()
+            with self._lock:
+                rev = self._revisions.get(name, 0) + 1
+                self._revisions[name] = rev
+                sf = SharedFrame(name=name, revision=rev, df=df, loaded_at=time.monotonic())
+                self._frames[name] = sf
+                # Derived values of older revisions stay alive only while a session references them
+                self._derived = {k: v for k, v in self._derived.items() if k[0] != name or k[1] == rev}
+            return sf
+
+    def invalidate(self, name: str) -> None:
+        with self._lock:
+            self._frames.pop(name, None)
+
+    def derived(self, sf: SharedFrame, key, builder: Callable[[], Any]) -> Any:
+        k = (sf.name, sf.revision, key)
+        hit = self._derived.get(k)
+        if hit is not None:
+            return hit
+        value = builder()
+        with self._lock:
+            # Only cache against the current revision
+            if self._revisions.get(sf.name) == sf.revision:
+                self._derived.setdefault(k, value)
+                value = self._derived[k]
+        return value
+
+    def is_shared(self, obj: Any) -> bool:
+        # Snapshot under the lock: other sessions' threads mutate both dicts
+        with self._lock:
+            frames = list(self._frames.values())
+            derived = list(self._derived.values())
+        if any(sf.df is obj for sf in frames):
+            return True
+        return any(v is obj or getattr(v, "frame", None) is obj for v in derived)
+
+
+FRAME_STORE = FrameStore(max_age_seconds=SHARED_FRAME_MAX_AGE_SECONDS)
+
+
+def apply_overlay(base: pd.DataFrame, overlay: pd.DataFrame, key: str = "session_id") -> pd.DataFrame:
+    """
+    Return `base` with rows matched on `key` replaced by `overlay`'s values
+    (overlay is indexed by key, one column per changed field; NaN means
+    "unchanged"). `base` is not modified; with copy-on-write only the
+    overlaid columns are copied.
+    """
+    out = base.copy(deep=False)
+    if overlay.empty:
+        return out
+
+    keys = out[key].astype(str)
+    for field in overlay.columns:
+        col = overlay[field].dropna()
+        hit = keys.isin(col.index)
+        if not hit.any():
+            continue
+        new_vals = keys.map(col)
+        if field in out.columns:
+            out[field] = out[field].where(~hit, new_vals)
+        else:
+            out[field] = new_vals.where(hit, "")
+    return out
+
+
+def _frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def memory_report(state: Mapping) -> pd.DataFrame:
+    """
+    Bytes held by each DataFrame-like value in a session's state, split into
+    shared (owned by FRAME_STORE, paid once per process) and private.
+    """
+    rows = []
+    for k, v in state.items():
+        frame = v if isinstance(v, pd.DataFrame) else getattr(v, "frame", None)
+        if not isinstance(frame, pd.DataFrame):
+            continue
+        shared = FRAME_STORE.is_shared(v) or FRAME_STORE.is_shared(frame)
+        rows.append({"key": str(k), "rows": len(frame), "bytes": _frame_bytes(frame), "shared": shared})
+
+    report = pd.DataFrame(rows, columns=["key", "rows", "bytes", "shared"])
+    return report.sort_values("bytes", ascending=False, ignore_index=True)
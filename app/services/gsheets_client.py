@@ -1,8 +1,90 @@
+import re
+import threading
+import time
+
 import streamlit as st
 import json
 import gspread
 from gspread.exceptions import WorksheetNotFound, APIError
 from google.oauth2.service_account import Credentials
+from google.auth.transport.requests import AuthorizedSession
+from requests.adapters import HTTPAdapter
+
+from app.services.tenancy import current_tenant, tenant_sheet_ids
+
+# One HTTP connection pool for every tenant: TLS + auth are paid once per
+# process, not per spreadsheet or per request.
+POOL_CONNECTIONS = 4      # distinct hosts (sheets.googleapis.com, oauth2, drive)
+POOL_MAXSIZE = 32         # keep-alive connections per host, shared by all sessions
+# Sheets API default is 60 requests/min/user, and every tenant uses the same
+# service account: one process-wide budget (ACCOUNT_QUOTA_PER_MINUTE), with
+# each tenant's budget (TENANT_QUOTA_PER_MINUTE) a sub-budget inside it
+DEFAULT_QUOTA_PER_MINUTE = 60
+
+_SHEET_ID_RE = re.compile(r"/spreadsheets/([A-Za-z0-9_-]+)")
+
+
+def _quota(value, name: str) -> float:
+    try:
+        per_minute = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number, got {value!r}") from None
+    if per_minute <= 0:
+        raise ValueError(f"{name} must be > 0, got {value!r}")
+    return per_minute
+
+
+class _TokenBucket:
+    def __init__(self, per_minute: float) -> None:
+        if per_minute <= 0:
+            raise ValueError(f"per_minute must be > 0, got {per_minute!r}")
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, float(per_minute))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request is allowed."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class PooledSession(AuthorizedSession):
+    """
+    AuthorizedSession (keep-alive, auto token refresh) with a bigger
+    connection pool, a request budget for the whole service account and a
+    per-spreadsheet budget inside it.
+    """
+
+    def __init__(self, credentials, account_per_minute: float = DEFAULT_QUOTA_PER_MINUTE) -> None:
+        super().__init__(credentials)
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+        self.mount("https://", adapter)
+        self._account_bucket = _TokenBucket(account_per_minute)
+        self._buckets: dict[str, _TokenBucket] = {}
+
+    def set_quota(self, sheet_id: str, per_minute: float) -> None:
+        self._buckets[sheet_id] = _TokenBucket(per_minute)
+
+    def request(self, method, url, *args, **kwargs):
+        m = _SHEET_ID_RE.search(url)
+        bucket = self._buckets.get(m.group(1)) if m else None
+        # Tenant first, so a branch over its share waits without holding account tokens
+        if bucket is not None:
+            bucket.acquire()
+        self._account_bucket.acquire()
+        return super().request(method, url, *args, **kwargs)
+
+
 # -----------------------------
 # Google Sheets client (safe to cache)
 # -----------------------------
@@ -19,10 +101,25 @@ def get_gsheets_client():
             "https://www.googleapis.com/auth/drive",
         ],
     )
-    return gspread.authorize(credentials)
+    account_quota = _quota(st.secrets.get("ACCOUNT_QUOTA_PER_MINUTE", DEFAULT_QUOTA_PER_MINUTE), "ACCOUNT_QUOTA_PER_MINUTE")
+    return gspread.Client(auth=credentials, session=PooledSession(credentials, account_quota))
 
 @st.cache_resource
-def get_spreadsheet():
+def _open_spreadsheet(tenant: str):
     client = get_gsheets_client()
-    sheet_id = st.secrets["GOOGLE_SHEET_ID"]
-    return client.open_by_key(sheet_id)
\ No newline at end of file
+    sheet_id = tenant_sheet_ids()[tenant]
+
+    quotas = st.secrets.get("TENANT_QUOTA_PER_MINUTE", {})
+    per_minute = quotas.get(tenant, DEFAULT_QUOTA_PER_MINUTE) if hasattr(quotas, "get") else quotas
+    _session(client).set_quota(sheet_id, _quota(per_minute, f"TENANT_QUOTA_PER_MINUTE for {tenant!r}"))
+
+    return client.open_by_key(sheet_id)
+
+def _session(client) -> PooledSession:
+    # gspread 6 keeps the session on client.http_client, gspread 5 on the client
+    http = getattr(client, "http_client", client)
+    return http.session
+
+def get_spreadsheet(tenant: str = None):
+    """Spreadsheet for `tenant` (default: the current session's tenant)."""
+    return _open_spreadsheet(tenant or current_tenant())
@@ -0,0 +1,206 @@
+# app/services/profiling.py
+"""
+Lightweight wall-time profiling for reruns.
+
+    with timed("sessions.month_view"): ...
+    @timed("sheets.load_classes")
+    def load_classes_df(): ...
+
+Every timing goes into a process-wide, bounded histogram per phase (p50/p95
+on demand) and into the current rerun's list, which begin_rerun()/end_rerun()
+write as one JSON line to a rotating log file. Fragment-only reruns write
+their own line (timed(..., fragment=True) on the fragment body). With
+?profile=1 in the URL the rerun also runs under cProfile and the top
+functions are kept for display.
+"""
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from collections import defaultdict, deque
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+import streamlit as st
+from streamlit import runtime
+
+from app.config import PROFILE_LOG_BACKUPS, PROFILE_LOG_MAX_BYTES, PROFILE_LOG_PATH
+
+SAMPLES_PER_PHASE = 2000
+PENDING_MAX = 1000  # timings buffered per session between flushes
+KEY_PENDING = "_profile_pending"
+KEY_FULL_RUN = "_profile_full_run"
+KEY_PROFILER = "_profile_cprofile"
+KEY_LAST_CPROFILE = "_profile_last_cprofile"
+
+_lock = threading.Lock()
+_samples: dict[str, deque] = defaultdict(lambda: deque(maxlen=SAMPLES_PER_PHASE))
+_headless_pending: deque = deque(maxlen=PENDING_MAX)  # jobs/CLI: nobody flushes
+_tls = threading.local()
+_logger: Optional[logging.Logger] = None
+
+
+# -----------------------------
+# Recording
+# -----------------------------
+def _pending():
+    if runtime.exists():
+        try:
+            return st.session_state.setdefault(KEY_PENDING, deque(maxlen=PENDING_MAX))
+        except Exception:
+            pass  # no script context (e.g. a worker thread)
+    return _headless_pending
+
+
+def record(phase: str, seconds: float) -> None:
+    with _lock:
+        _samples[phase].append(seconds)
+    _pending().append((phase, seconds))
+
+
+def _in_full_run() -> bool:
+    try:
+        return bool(st.session_state.get(KEY_FULL_RUN))
+    except Exception:
+        return False
+
+
+class timed:
+    """
+    Context manager and decorator timing one phase. fragment=True marks an
+    @st.fragment body: when it runs on its own (not inside a full rerun) its
+    timings are flushed as their own log line when it returns.
+    """
+
+    def __init__(self, phase: str, fragment: bool = False) -> None:
+        self.phase = phase
+        self.fragment = fragment
+
+    def __enter__(self):
+        stack = getattr(_tls, "starts", None)
+        if stack is None:
+            stack = _tls.starts = []
+        stack.append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        record(self.phase, time.perf_counter() - _tls.starts.pop())
+        return False
+
+    def __call__(self, fn):
+        phase, fragment = self.phase, self.fragment
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                with timed(phase):
+                    return fn(*args, **kwargs)
+            finally:
+                if fragment and runtime.exists() and not _in_full_run():
+                    _flush(_pending(), kind="fragment")
+
+        return wrapper
+
+
+# -----------------------------
+# Per-rerun boundaries
+# -----------------------------
+def _get_logger() -> Optional[logging.Logger]:
+    global _logger
+    if not PROFILE_LOG_PATH:
+        return None
+    if _logger is None:
+        with _lock:
+            if _logger is None:
+                os.makedirs(os.path.dirname(PROFILE_LOG_PATH) or ".", exist_ok=True)
+                logger = logging.getLogger("mathct.profile")
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                handler = RotatingFileHandler(PROFILE_LOG_PATH, maxBytes=PROFILE_LOG_MAX_BYTES, backupCount=PROFILE_LOG_BACKUPS)
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger.addHandler(handler)
+                _logger = logger
+    return _logger
+
+
+def _flush(pending, kind: str = "rerun") -> None:
+    if not pending:
+        return
+    phases: dict[str, float] = defaultdict(float)
+    for phase, seconds in pending:
+        phases[phase] += seconds
+    pending.clear()
+
+    logger = _get_logger()
+    if logger is not None:
+        logger.info(json.dumps({"ts": time.time(), "kind": kind, "phases": {k: round(v, 6) for k, v in phases.items()}}))
+
+
+def begin_rerun(sample: bool = False) -> None:
+    """
+    Call first thing in the script. Flushes timings left by a run that ended
+    early (st.stop / st.rerun) and disables its profiler, then starts cProfile
+    if `sample` is set.
+    """
+    _flush(_pending())
+    if not runtime.exists():
+        return
+    st.session_state[KEY_FULL_RUN] = True
+
+    stale = st.session_state.pop(KEY_PROFILER, None)
+    if stale is not None:
+        stale.disable()
+    if sample:
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:
+            return  # another session is profiling (one profiler per interpreter on 3.12+)
+        st.session_state[KEY_PROFILER] = prof
+
+
+def end_rerun(top: int = 30) -> None:
+    """Call last thing in the script; writes this rerun's log line."""
+    _flush(_pending())
+    if runtime.exists():
+        st.session_state[KEY_FULL_RUN] = False
+        prof = st.session_state.pop(KEY_PROFILER, None)
+        if prof is not None:
+            prof.disable()
+            out = io.StringIO()
+            pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(top)
+            st.session_state[KEY_LAST_CPROFILE] = out.getvalue()
+            logger = _get_logger()
+            if logger is not None:
+                logger.info(json.dumps({"ts": time.time(), "cprofile": out.getvalue()}))
+
+
+# -----------------------------
+# Reporting
+# -----------------------------
+def _pct(sorted_vals: list, q: float) -> float:
+    i = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[i]
+
+
+def phase_stats() -> list[dict]:
+    """Per phase: count, p50/p95/max in milliseconds over the last SAMPLES_PER_PHASE runs."""
+    with _lock:
+        snapshot = {k: sorted(v) for k, v in _samples.items() if v}
+    rows = []
+    for phase, vals in sorted(snapshot.items()):
+        rows.append(
+            {
+                "phase": phase,
+                "count": len(vals),
+                "p50_ms": round(_pct(vals, 0.50) * 1000, 2),
+                "p95_ms": round(_pct(vals, 0.95) * 1000, 2),
+                "max_ms": round(vals[-1] * 1000, 2),
+            }
+        )
+    return rows
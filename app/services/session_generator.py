@@ -0,0 +1,153 @@
+# app/services/session_generator.py
+import uuid
+from datetime import date, datetime
+from typing import Optional
+
+import pandas as pd
+import pytz
+
+from app.config import SESSIONS_HEADERS, WEEKDAYS
+from app.repositories.classes_repo import compiled_schedules, load_classes_df
+from app.repositories.sessions_repo import append_sessions, load_sessions_df
+from app.repositories.holidays_repo import holiday_calendars, load_holidays_df
+from app.repositories.meta_repo import archived_before, load_meta_df
+from app.models.schedule import NO_HOLIDAYS, HolidayCalendars
+from app.utils.dates import month_bounds
+from app.services.profiling import timed
+
+
+def _parse_rate(x) -> float:
+    if x is None:
+        return 0.0
+    if isinstance(x, (int, float)):
+        return float(x)
+    s = str(x).strip()
+    if not s:
+        return 0.0
+    s = s.replace(",", "")
+    try:
+        return float(s)
+    except Exception:
+        return 0.0
+
+
+@timed("sessions.generate")
+def generate_sessions_for_month(
+    classes_df: pd.DataFrame,
+    month_first: date,
+    calendars: HolidayCalendars = NO_HOLIDAYS,
+) -> pd.DataFrame:
+    """
+    Planned sessions for every class in the month, from each class's compiled
+    recurrence rule. Exception dates and holidays are never materialized.
+    """
+    first, last = month_bounds(month_first)
+
+    schedules = compiled_schedules(classes_df)
+    names = classes_df.reindex(columns=["class_id", "class_name", "rate"], fill_value="")
+
+    parts = []
+    for (class_id, class_name, rate), sched in zip(names.itertuples(index=False, name=None), schedules):
+        class_id = str(class_id).strip()
+        if not class_id or sched.empty:
+            continue
+
+        ords, planned = sched.occurrence_arrays(first, last, calendars)
+        if len(ords) == 0:
+            continue
+
+        rate = _parse_rate(rate)
+        parts.append(
+            pd.DataFrame(
+                {
+                    "class_id": class_id,
+                    "class_name": str(class_name).strip(),
+                    "ord": ords,
+                    "planned_duration_hours": planned,
+                    "rate": rate,
+                }
+            )
+        )
+
+    if not parts:
+        return pd.DataFrame(columns=SESSIONS_HEADERS)
+
+    df = pd.concat(parts, ignore_index=True)
+    dates = [date.fromordinal(int(o)) for o in df["ord"]]
+    now_utc = datetime.now(pytz.UTC).isoformat()
+
+    df["session_id"] = [str(uuid.uuid4()) for _ in range(len(df))]
+    df["session_date"] = [d.isoformat() for d in dates]
+    df["weekday"] = [WEEKDAYS[d.weekday()] for d in dates]
+    df["actual_duration_hours"] = df["planned_duration_hours"]
+    df["fee"] = df["planned_duration_hours"] * df["rate"]
+    df["status"] = "planned"
+    df["note"] = ""
+    df["created_at_utc"] = now_utc
+    df["updated_at_utc"] = now_utc
+    return df[SESSIONS_HEADERS]
+
+
+def existing_session_keys(sessions_df: pd.DataFrame) -> set[tuple[str, str]]:
+    """(class_id, session_date) pairs already in Sessions; the dedup key for generation."""
+    if sessions_df.empty:
+        return set()
+    return set(zip(sessions_df["class_id"].astype(str), sessions_df["session_date"].astype(str)))
+
+
+def filter_new_sessions(planned_df: pd.DataFrame, existing_keys: set[tuple[str, str]]) -> pd.DataFrame:
+    if planned_df.empty:
+        return planned_df
+    keys = zip(planned_df["class_id"].astype(str), planned_df["session_date"].astype(str))
+    mask = [k not in existing_keys for k in keys]
+    return planned_df[mask].copy()
+
+
+def missing_month_sessions(
+    month_first: date,
+    classes_df: pd.DataFrame,
+    sessions_df: pd.DataFrame,
+    calendars: HolidayCalendars = NO_HOLIDAYS,
+    archive_cutoff: Optional[date] = None,
+) -> pd.DataFrame:
+    """
+    Planned sessions for the month that `sessions_df` doesn't have yet; no
+    Sheets calls. Months before `archive_cutoff` live in Sessions_Archive, not
+    `sessions_df`, so nothing is planned for them.
+    """
+    if archive_cutoff is not None and month_first < archive_cutoff:
+        return pd.DataFrame(columns=SESSIONS_HEADERS)
+    planned_df = generate_sessions_for_month(classes_df, month_first, calendars)
+    if planned_df.empty:
+        return planned_df
+    return filter_new_sessions(planned_df, existing_session_keys(sessions_df))
+
+
+@timed("sessions.ensure_month")
+def ensure_month_sessions_exist(
+    month_first: date,
+    classes_df: Optional[pd.DataFrame] = None,
+    sessions_df: Optional[pd.DataFrame] = None,
+    calendars: Optional[HolidayCalendars] = None,
+    meta_df: Optional[pd.DataFrame] = None,
+) -> int:
+    """
+    Append any planned sessions missing for the month; returns how many were
+    added. Pass already-loaded frames to skip the Sheets reads; `sessions_df`
+    must be current, since it is what new sessions are deduplicated against.
+    """
+    if classes_df is None:
+        classes_df = load_classes_df()
+    if sessions_df is None:
+        sessions_df = load_sessions_df()
+    if calendars is None:
+        calendars = holiday_calendars(load_holidays_df())
+    if meta_df is None:
+        meta_df = load_meta_df()
+
+    to_add = missing_month_sessions(month_first, classes_df, sessions_df, calendars, archived_before(meta_df))
+    if to_add.empty:
+        return 0
+
+    append_sessions(to_add.astype(str).values.tolist())
+    return len(to_add)
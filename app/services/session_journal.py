@@ -0,0 +1,113 @@
+# app/services/session_journal.py
+"""
+Append-only change journal for the Sessions tab.
+
+Instead of rewriting the whole tab, a save appends one event per changed
+field (session_id, field, value, version, ts_utc). Current state is the
+Sessions tab with the journal replayed on top; compact() folds the journal
+back into the tab and empties it (see `python -m app.jobs compact-journal`).
+Anything that rewrites Sessions must go through overwrite_and_fold() with
+the journal it replayed, so those events are not replayed over the new base
+while events saved in the meantime are kept.
+"""
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from app.config import SESSIONS_HEADERS
+from app.repositories.journal_repo import append_journal, clear_journal, load_journal_df
+from app.repositories.sessions_repo import load_sessions_df, overwrite_sessions_df
+from app.services.frame_store import apply_overlay
+
+# Not journaled as its own event; replay sets it from the latest event's ts_utc
+_DERIVED_FIELDS = {"session_id", "updated_at_utc"}
+
+
+def _unchanged(old: pd.Series, new: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(new):
+        o = pd.to_numeric(old, errors="coerce")
+        n = pd.to_numeric(new, errors="coerce")
+        return ((o - n).abs() < 1e-9) | (o.isna() & n.isna())
+    return old.fillna("").astype(str) == new.fillna("").astype(str)
+
+
+def diff_events(base_df: pd.DataFrame, overlay: pd.DataFrame) -> list[list]:
+    """Journal rows for the fields in `overlay` (indexed by session_id) that differ from `base_df`."""
+    if overlay.empty:
+        return []
+
+    base = base_df.drop_duplicates("session_id", keep="last")
+    base = base.set_index(base["session_id"].astype(str))
+
+    version = time.time_ns() // 1000
+    ts = datetime.now(timezone.utc).isoformat()
+
+    rows = []
+    for field in overlay.columns:
+        if field in _DERIVED_FIELDS:
+            continue
+        new = overlay[field]
+        if field in base.columns:
+            old = base[field].reindex(new.index)
+        else:
+            old = pd.Series("", index=new.index)
+        changed = ~_unchanged(old, new)
+        for sid, value in new[changed].items():
+            rows.append([str(sid), field, str(value), version, ts])
+    return rows
+
+
+def record_changes(base_df: pd.DataFrame, overlay: pd.DataFrame) -> int:
+    """Append one event per changed field; returns the number of events written."""
+    rows = diff_events(base_df, overlay)
+    append_journal(rows)
+    return len(rows)
+
+
+def replay(base_df: pd.DataFrame, journal_df: pd.DataFrame) -> pd.DataFrame:
+    if journal_df.empty:
+        return base_df
+
+    j = journal_df[journal_df["field"].isin(SESSIONS_HEADERS) & ~journal_df["field"].isin(_DERIVED_FIELDS)]
+    if j.empty:
+        return base_df
+    j = j.assign(_v=pd.to_numeric(j["version"], errors="coerce").fillna(0)).sort_values("_v", kind="stable")
+
+    last = j.drop_duplicates(["session_id", "field"], keep="last")
+    # NaN = field not touched for that session; apply_overlay leaves it alone
+    overlay = last.pivot(index="session_id", columns="field", values="value")
+    overlay["updated_at_utc"] = j.groupby("session_id")["ts_utc"].last()
+    return apply_overlay(base_df, overlay)
+
+
+def load_current_sessions() -> tuple[pd.DataFrame, pd.DataFrame]:
+    """(current state, journal events it includes), for callers that will fold."""
+    journal = load_journal_df()
+    return replay(load_sessions_df(), journal), journal
+
+
+def load_current_sessions_df() -> pd.DataFrame:
+    """Sessions tab + journal replay: what the app and jobs should read."""
+    return load_current_sessions()[0]
+
+
+def overwrite_and_fold(df_all: pd.DataFrame, folded: pd.DataFrame) -> None:
+    """
+    Rewrite Sessions with a full current-state frame, then delete the journal
+    events `folded` into it (the journal returned by load_current_sessions()).
+    Events appended after that read are left to replay on the new base. If we
+    die in between, replaying the folded events onto the new base re-applies
+    values it already has.
+    """
+    overwrite_sessions_df(df_all)
+    clear_journal(folded)
+
+
+def compact() -> int:
+    """Fold the journal into the Sessions tab; returns how many events were folded."""
+    current, journal = load_current_sessions()
+    if journal.empty:
+        return 0
+    overwrite_and_fold(current, journal)
+    return len(journal)
@@ -0,0 +1,181 @@
+# app/services/sheets_schema.py
+"""
+Process-level worksheet + header bootstrap.
+
+The first caller per spreadsheet pays for: one metadata fetch (all tabs),
+at most one batchUpdate to add missing tabs, one batch_get of every row 1,
+and at most one values batch update to fix headers. After that, worksheet
+handles and header checks are served from memory for the life of the process.
+Call invalidate_schema() (or use @schema_retry) when a tab was renamed,
+deleted or had its header row changed from under us.
+"""
+import functools
+import threading
+
+import gspread
+from gspread.exceptions import APIError, WorksheetNotFound
+
+from app.services.gsheets_client import get_spreadsheet
+from app.config import (
+    CLASSES_HEADERS,
+    CLASSES_TAB,
+    HOLIDAYS_HEADERS,
+    HOLIDAYS_TAB,
+    SESSIONS_HEADERS,
+    SESSIONS_JOURNAL_HEADERS,
+    SESSIONS_JOURNAL_TAB,
+    SESSIONS_TAB,
+)
+
+# Tabs every spreadsheet needs; created up front in a single batchUpdate.
+# Other tabs (archive, rollups, ...) are bootstrapped lazily on first use.
+BOOTSTRAP_SCHEMAS: dict[str, list[str]] = {
+    CLASSES_TAB: CLASSES_HEADERS,
+    SESSIONS_TAB: SESSIONS_HEADERS,
+    SESSIONS_JOURNAL_TAB: SESSIONS_JOURNAL_HEADERS,
+    HOLIDAYS_TAB: HOLIDAYS_HEADERS,
+}
+
+NEW_TAB_ROWS = 1000
+NEW_TAB_COLS = 50
+
+
+class _SchemaState:
+    def __init__(self) -> None:
+        self.worksheets: dict[str, gspread.Worksheet] = {}
+        self.verified: dict[str, tuple[str, ...]] = {}  # tab -> headers known to be in row 1
+
+
+_STATES: dict[str, _SchemaState] = {}
+_LOCK = threading.RLock()
+
+
+def _quote(tab: str) -> str:
+    return "'{}'".format(tab.replace("'", "''"))
+
+
+def _bootstrap(sh) -> _SchemaState:
+    state = _SchemaState()
+
+    # 1 call: metadata for every tab
+    state.worksheets = {ws.title: ws for ws in sh.worksheets()}
+
+    # <= 1 call: add all missing tabs at once
+    missing = [t for t in BOOTSTRAP_SCHEMAS if t not in state.worksheets]
+    if missing:
+        sh.batch_update(
+            {
+                "requests": [
+                    {
+                        "addSheet": {
+                            "properties": {
+                                "title": t,
+                                "gridProperties": {"rowCount": NEW_TAB_ROWS, "columnCount": NEW_TAB_COLS},
+                            }
+                        }
+                    }
+                    for t in missing
+                ]
+            }
+        )
+        state.worksheets = {ws.title: ws for ws in sh.worksheets()}
+
+    _verify_headers(sh, state, BOOTSTRAP_SCHEMAS)
+    return state
+
+
+def _verify_headers(sh, state: _SchemaState, schemas: dict[str, list[str]]) -> None:
+    tabs = list(schemas)
+    # 1 call: row 1 of every tab
+    resp = sh.values_batch_get([f"{_quote(t)}!1:1" for t in tabs])
+    ranges = resp.get("valueRanges", [])
+
+    fixes = []
+    for tab, vr in zip(tabs, ranges):
+        row1 = (vr.get("values") or [[]])[0]
+        if row1 != schemas[tab]:
+            fixes.append({"range": f"{_quote(tab)}!A1", "values": [schemas[tab]]})
+        state.verified[tab] = tuple(schemas[tab])
+
+    # <= 1 call: rewrite every wrong header row
+    if fixes:
+        sh.values_batch_update({"valueInputOption": "RAW", "data": fixes})
+
+
+def _state_for(sh) -> _SchemaState:
+    state = _STATES.get(sh.id)
+    if state is not None:
+        return state
+    with _LOCK:
+        state = _STATES.get(sh.id)
+        if state is None:
+            state = _bootstrap(sh)
+            _STATES[sh.id] = state
+        return state
+
+
+def get_worksheet(sh, tab_name: str):
+    """Worksheet handle from the process cache; creates the tab if needed."""
+    state = _state_for(sh)
+    ws = state.worksheets.get(tab_name)
+    if ws is not None:
+        return ws
+    with _LOCK:
+        ws = state.worksheets.get(tab_name)
+        if ws is None:
+            try:
+                ws = sh.worksheet(tab_name)
+            except WorksheetNotFound:
+                ws = sh.add_worksheet(title=tab_name, rows=NEW_TAB_ROWS, cols=NEW_TAB_COLS)
+            state.worksheets[tab_name] = ws
+        return ws
+
+
+def verify_headers(sh, tab_name: str, headers: list[str]) -> None:
+    """Ensure row 1 == headers; free once this process has checked it."""
+    state = _state_for(sh)
+    if state.verified.get(tab_name) == tuple(headers):
+        return
+    with _LOCK:
+        if state.verified.get(tab_name) != tuple(headers):
+            _verify_headers(sh, state, {tab_name: headers})
+
+
+def invalidate_schema(sh=None) -> None:
+    """Forget cached handles/headers (one spreadsheet, or all); next use re-bootstraps."""
+    with _LOCK:
+        if sh is None:
+            _STATES.clear()
+        else:
+            _STATES.pop(sh.id, None)
+
+
+# Statuses for a missing tab or a range that no longer parses; anything else
+# (429 quota, 5xx) says nothing about the schema
+_SCHEMA_ERROR_STATUSES = {400, 404}
+
+
+def _is_schema_error(exc: Exception) -> bool:
+    if isinstance(exc, WorksheetNotFound):
+        return True
+    return getattr(getattr(exc, "response", None), "status_code", None) in _SCHEMA_ERROR_STATUSES
+
+
+def schema_retry(fn):
+    """
+    Run a repository read; if it fails because the tab was renamed or deleted
+    since bootstrap, drop the current spreadsheet's cached schema and retry
+    once. Other API errors (quota, server) propagate untouched: re-bootstrapping
+    would only add calls. Reads only: retrying a write that may have landed
+    could duplicate rows.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except (APIError, WorksheetNotFound) as e:
+            if not _is_schema_error(e):
+                raise
+            invalidate_schema(get_spreadsheet())
+            return fn(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,146 @@
+# app/services/statements.py
+"""
+Month-end fee statements: one CSV + one PDF per class, written into a zip.
+
+The month's sessions are read once (as a MonthView) and split into small,
+picklable per-class tasks; rendering fans out over a process pool and each
+result is written into the zip as soon as it arrives, so memory holds a few
+statements at a time rather than the whole batch.
+"""
+import csv
+import io
+import multiprocessing
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import BinaryIO, Optional, Union
+
+from app.models.month_view import MonthView, format_fee
+from app.utils.pdf import text_pdf
+
+STATEMENT_COLS = ["Session date", "Weekday", "Hours", "Rate", "Fee", "Status", "Note"]
+
+
+@dataclass(frozen=True)
+class StatementTask:
+    month_key: str
+    class_id: str
+    class_name: str
+    rows: tuple  # (date iso, weekday, hours, rate, fee_raw, status, note)
+
+
+@dataclass(frozen=True)
+class ExportStats:
+    statements: int
+    files: int
+    bytes_written: int
+    seconds: float
+
+    @property
+    def per_second(self) -> float:
+        return self.statements / self.seconds if self.seconds else float(self.statements)
+
+    def __str__(self) -> str:
+        return (
+            f"{self.statements} statement(s), {self.files} file(s), "
+            f"{self.bytes_written / 1e6:.2f} MB in {self.seconds:.2f}s ({self.per_second:.1f}/s)"
+        )
+
+
+def statement_tasks(view: MonthView) -> list[StatementTask]:
+    if view.empty:
+        return []
+    tasks = []
+    for (cid, cname), g in view.frame.groupby(["class_id", "class_name"], sort=True):
+        g = g.sort_values("session_date")
+        rows = tuple(
+            (
+                d.isoformat() if hasattr(d, "isoformat") else str(d),
+                str(wd),
+                float(h),
+                float(r),
+                float(f),
+                str(st),
+                str(nt),
+            )
+            for d, wd, h, r, f, st, nt in g[
+                ["session_date", "weekday", "actual_duration_hours", "rate", "fee_raw", "status", "note"]
+            ].itertuples(index=False, name=None)
+        )
+        tasks.append(StatementTask(view.month_key, str(cid), str(cname), rows))
+    return tasks
+
+
+def _filename(task: StatementTask, ext: str) -> str:
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in task.class_id)
+    return f"{task.month_key}/{safe}.{ext}"
+
+
+def render_statement(task: StatementTask) -> list[tuple[str, bytes]]:
+    """(path in zip, content) for the class's CSV and PDF. Runs in a worker process."""
+    total_hours = sum(r[2] for r in task.rows)
+    total_fee = format_fee(sum(r[4] for r in task.rows))
+
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(["Class", task.class_id, task.class_name])
+    w.writerow(["Month", task.month_key])
+    w.writerow(STATEMENT_COLS)
+    for d, wd, h, r, f, st, nt in task.rows:
+        w.writerow([d, wd, f"{h:.2f}", f"{r:.2f}", format_fee(f), st, nt])
+    w.writerow(["Total", "", f"{total_hours:.2f}", "", total_fee, "", ""])
+    csv_bytes = buf.getvalue().encode("utf-8-sig")  # BOM so Excel reads Vietnamese names
+
+    lines = [
+        f"Fee statement  {task.month_key}",
+        f"{task.class_id} - {task.class_name}",
+        "",
+        f"{'Date':<11} {'Day':<4} {'Hours':>6} {'Rate':>9} {'Fee':>12}  {'Status':<10} Note",
+        "-" * 72,
+    ]
+    for d, wd, h, r, f, st, nt in task.rows:
+        lines.append(f"{d:<11} {wd:<4} {h:>6.2f} {r:>9.2f} {format_fee(f):>12}  {st[:10]:<10} {nt[:20]}")
+    lines += ["-" * 72, f"{'Total':<16} {total_hours:>6.2f} {'':>9} {total_fee:>12}", f"Sessions: {len(task.rows)}"]
+
+    return [(_filename(task, "csv"), csv_bytes), (_filename(task, "pdf"), text_pdf(lines))]
+
+
+def export_statements_zip(
+    view: MonthView,
+    out: Union[str, BinaryIO],
+    workers: Optional[int] = None,
+    chunksize: int = 8,
+) -> ExportStats:
+    """
+    Render every class statement in `view` into the zip at `out` (path or
+    writable binary file). workers=1 renders in-process.
+
+    Only use a process pool from a real module entry point (python -m
+    app.jobs). Under `streamlit run`, __main__ is the script with no
+    __spec__, so each spawn child would re-run the whole app.
+    """
+    t0 = time.perf_counter()
+    tasks = statement_tasks(view)
+    files = 0
+    written = 0
+
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        def _write(results):
+            nonlocal files, written
+            for name, data in results:
+                zf.writestr(name, data)
+                files += 1
+                written += len(data)
+
+        if workers == 1 or len(tasks) <= 1:
+            for task in tasks:
+                _write(render_statement(task))
+        else:
+            # spawn rather than fork: the parent may hold locks in other threads
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                for results in pool.map(render_statement, tasks, chunksize=chunksize):
+                    _write(results)
+
+    return ExportStats(len(tasks), files, written, time.perf_counter() - t0)
@@ -0,0 +1,77 @@
+# app/services/tenancy.py
+"""
+One deployment, many spreadsheets (one per branch).
+
+Secrets:
+
+    GOOGLE_SHEET_ID = "..."          # optional; becomes the "default" tenant
+
+    [TENANTS]
+    district1 = "spreadsheet id"
+    district3 = "spreadsheet id"
+
+    [TENANT_PASSWORDS]               # optional; branches not listed use APP_PASSWORD
+    district1 = "..."
+
+The current tenant lives in session_state (picked at login, preselected from
+?tenant=...), or in a module default when running headless (python -m app.jobs
+--tenant ...). Anything cached per process must be keyed by tenant_key().
+"""
+import streamlit as st
+from streamlit import runtime
+
+DEFAULT_TENANT = "default"
+KEY_TENANT = "tenant"
+
+_headless_tenant = None
+
+
+def tenant_sheet_ids() -> dict[str, str]:
+    tenants = {str(k): str(v) for k, v in dict(st.secrets.get("TENANTS", {})).items()}
+    if "GOOGLE_SHEET_ID" in st.secrets:
+        tenants.setdefault(DEFAULT_TENANT, str(st.secrets["GOOGLE_SHEET_ID"]))
+    return tenants
+
+
+def default_tenant() -> str:
+    tenants = tenant_sheet_ids()
+    if not tenants:
+        raise KeyError("No spreadsheet configured: set GOOGLE_SHEET_ID or [TENANTS] in secrets")
+    return DEFAULT_TENANT if DEFAULT_TENANT in tenants else next(iter(tenants))
+
+
+def current_tenant() -> str:
+    if runtime.exists():
+        t = st.session_state.get(KEY_TENANT)
+    else:
+        t = _headless_tenant
+    return t or default_tenant()
+
+
+def set_tenant(tenant: str) -> None:
+    global _headless_tenant
+    if tenant not in tenant_sheet_ids():
+        raise KeyError(f"Unknown tenant {tenant!r}")
+    if runtime.exists():
+        st.session_state[KEY_TENANT] = tenant
+    else:
+        _headless_tenant = tenant
+
+
+def init_tenant_from_query() -> None:
+    """Honour ?tenant=<name> once per browser session."""
+    if KEY_TENANT in st.session_state:
+        return
+    t = st.query_params.get("tenant")
+    st.session_state[KEY_TENANT] = t if t in tenant_sheet_ids() else default_tenant()
+
+
+def tenant_password(tenant: str) -> str:
+    """The branch's login password: its [TENANT_PASSWORDS] entry, else APP_PASSWORD."""
+    passwords = {str(k): str(v) for k, v in dict(st.secrets.get("TENANT_PASSWORDS", {})).items()}
+    return passwords.get(tenant) or str(st.secrets["APP_PASSWORD"])
+
+
+def tenant_key(name: str, tenant: str = None) -> str:
+    """Namespace a process-wide cache key by tenant."""
+    return f"{tenant or current_tenant()}:{name}"
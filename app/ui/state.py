@@ -10,6 +10,9 @@ KEY_CLASS_NAME = "class_name"
 KEY_RATE = "rate"
 KEY_START_DATE = "start_date"
 KEY_END_DATE = "end_date"
+KEY_INTERVAL_WEEKS = "interval_weeks"
+KEY_HOLIDAY_CALENDAR = "holiday_calendar"
+KEY_EXCEPTION_DATES = "exception_dates"
 
 def _new_schedule_row(day: str = "Mon", duration: float = 1.0) -> dict:
     return {"row_id": str(uuid.uuid4()), "day": day, "duration": float(duration)}
@@ -18,6 +21,7 @@ def init_state_if_missing() -> None:
     """Call at the top of the page before rendering widgets."""
     if KEY_SCHEDULE_ROWS not in st.session_state:
         st.session_state[KEY_SCHEDULE_ROWS] = [_new_schedule_row()]
+    st.session_state.setdefault(KEY_INTERVAL_WEEKS, 1)
 
 def add_schedule_row() -> None:
     st.session_state[KEY_SCHEDULE_ROWS].append(_new_schedule_row())
@@ -43,5 +47,8 @@ def apply_reset_if_marked() -> None:
         st.session_state[KEY_RATE] = ""
         st.session_state[KEY_START_DATE] = None
         st.session_state[KEY_END_DATE] = None
+        st.session_state[KEY_INTERVAL_WEEKS] = 1
+        st.session_state[KEY_HOLIDAY_CALENDAR] = ""
+        st.session_state[KEY_EXCEPTION_DATES] = ""
         st.session_state[KEY_SCHEDULE_ROWS] = [_new_schedule_row()]
         st.session_state[KEY_DO_RESET] = False
@@ -0,0 +1,25 @@
+from datetime import date, timedelta
+
+
+def month_key(d: date) -> str:
+    return f"{d.year:04d}-{d.month:02d}"
+
+
+def month_bounds(d: date) -> tuple[date, date]:
+    first = d.replace(day=1)
+    if first.month == 12:
+        next_month = first.replace(year=first.year + 1, month=1, day=1)
+    else:
+        next_month = first.replace(month=first.month + 1, day=1)
+    last = next_month - timedelta(days=1)
+    return first, last
+
+
+def parse_iso_date(s: str):
+    s = (s or "").strip()
+    if not s:
+        return None
+    try:
+        return date.fromisoformat(s)
+    except Exception:
+        return None
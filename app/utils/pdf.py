@@ -0,0 +1,60 @@
+import unicodedata
+
+# Minimal text-only PDF writer (Courier, A4) for statements; no extra dependency.
+# Base-14 fonts only cover Latin-1, so other characters are transliterated.
+
+PAGE_W, PAGE_H = 595, 842  # A4 in points
+MARGIN = 48
+FONT_SIZE = 9
+LEADING = 12
+LINES_PER_PAGE = (PAGE_H - 2 * MARGIN) // LEADING
+
+
+def _latin1(s: str) -> str:
+    s = str(s).replace("đ", "d").replace("Đ", "D")
+    s = "".join(c for c in unicodedata.normalize("NFKD", s) if not unicodedata.combining(c))
+    return s.encode("latin-1", errors="replace").decode("latin-1")
+
+
+def _escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def text_pdf(lines: list[str]) -> bytes:
+    """One monospaced line per entry, paginated."""
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+
+    # 1 catalog, 2 pages, 3 font, then (page, content) per page
+    objects: list[bytes] = [b"", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>"]
+    kids = []
+    for page_lines in pages:
+        ops = [f"BT /F1 {FONT_SIZE} Tf {LEADING} TL {MARGIN} {PAGE_H - MARGIN} Td"]
+        for ln in page_lines:
+            ops.append(f"({_escape(_latin1(ln))}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+
+        page_no = len(objects) + 1
+        content_no = page_no + 1
+        kids.append(f"{page_no} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_W} {PAGE_H}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_no} 0 R >>".encode("latin-1")
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode("latin-1")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
@@ -1,14 +1,17 @@
 import pandas as pd
 import streamlit as st
+
+# Before anything builds frames; shared frames rely on it (app/services/frame_store.py)
+pd.set_option("mode.copy_on_write", True)
 import gspread
 from gspread.exceptions import WorksheetNotFound, APIError
 from dataclasses import dataclass, asdict
 from datetime import datetime, date
 import pytz
 from typing import Optional
-import uuid
 
 from app.services.gsheets_client import get_gsheets_client, get_spreadsheet
+from app.services.tenancy import KEY_TENANT, current_tenant, init_tenant_from_query, tenant_key, tenant_password, tenant_sheet_ids
 from app.models.classes import Classes
 from app.config import CLASSES_HEADERS, CLASSES_TAB, WEEKDAYS
 from app.repositories.classes_repo import (
@@ -17,271 +20,207 @@ from app.repositories.classes_repo import (
     next_class_id,
     append_class_to_sheet,
     load_classes_df,
-)   
+)
+from app.services.session_journal import load_current_sessions, load_current_sessions_df, overwrite_and_fold, record_changes
+from app.repositories.holidays_repo import holiday_calendars, load_holidays_df
+from app.repositories.meta_repo import archived_before, load_meta_df
+from app.services.session_generator import ensure_month_sessions_exist, missing_month_sessions
 from app.ui.state import (
     init_state_if_missing,
     add_schedule_row,
     remove_schedule_row,
     mark_reset,
     apply_reset_if_marked)
-
-import json
-from datetime import timedelta
-
-def _month_key(d: date) -> str:
-    return f"{d.year:04d}-{d.month:02d}"
-
+from app.models.month_view import MonthView, ClassGroup, build_month_view
+from app.models.class_index import ClassIndex
+from app.services.statements import export_statements_zip
+from app.utils.dates import month_key, parse_iso_date
+from app.services.frame_store import (
+    FRAME_STORE,
+    CLASSES_FRAME,
+    SESSIONS_FRAME,
+    HOLIDAYS_FRAME,
+    META_FRAME,
+    apply_overlay,
+    memory_report,
+)
+from app.services.profiling import KEY_LAST_CPROFILE, begin_rerun, end_rerun, phase_stats, timed
+
+import hmac
+import os
+import tempfile
+
+@timed("ui.refresh_classes")
 def refresh_classes_cache():
-    st.session_state["classes_df_cache"] = load_classes_df()
+    # Reference to the process-wide frame; no per-session copy
+    classes = FRAME_STORE.get(tenant_key(CLASSES_FRAME), load_classes_df)
+    st.session_state["classes_df_cache"] = classes.df
+    # Search index is built once per Classes revision and shared like the frame
+    st.session_state["classes_index_cache"] = FRAME_STORE.derived(classes, "search_index", lambda: ClassIndex.build(classes.df))
     st.session_state["classes_cache_ready"] = True
 
+@timed("ui.refresh_sessions")
 def refresh_sessions_cache(month_first: date):
-    # Call Sheets ONLY here
-    _ensure_month_sessions_exist(month_first)
-
-    sessions_df = load_sessions_df()
-    sessions_df["session_date_dt"] = pd.to_datetime(sessions_df["session_date"], errors="coerce")
-
-    first, last = _month_bounds(month_first)
-    month_df = sessions_df[
-        (sessions_df["session_date_dt"] >= pd.Timestamp(first))
-        & (sessions_df["session_date_dt"] <= pd.Timestamp(last))
-    ].copy()
-
-    # Normalize types for editor
-    if not month_df.empty:
-        month_df["actual_duration_hours"] = pd.to_numeric(month_df["actual_duration_hours"], errors="coerce").fillna(0.0)
-        month_df["rate"] = pd.to_numeric(month_df["rate"], errors="coerce").fillna(0.0)
-        month_df["session_date"] = pd.to_datetime(month_df["session_date"], errors="coerce").dt.date
-
-    st.session_state["sessions_df_full_cache"] = sessions_df
-    st.session_state["sessions_month_df_cache"] = month_df
-    st.session_state["sessions_month_key_cache"] = _month_key(month_first)
+    # Call Sheets ONLY here (and only if the shared frames are stale). Deployments
+    # with the nightly `python -m app.jobs materialize` cron can set
+    # UI_MATERIALIZE_SESSIONS = false so the UI only reads.
+    sessions = FRAME_STORE.get(tenant_key(SESSIONS_FRAME), load_current_sessions_df)
+    if st.secrets.get("UI_MATERIALIZE_SESSIONS", True):
+        classes_df = FRAME_STORE.get(tenant_key(CLASSES_FRAME), load_classes_df).df
+        holidays = FRAME_STORE.get(tenant_key(HOLIDAYS_FRAME), load_holidays_df)
+        calendars = FRAME_STORE.derived(holidays, "calendars", lambda: holiday_calendars(holidays.df))
+        cutoff = archived_before(FRAME_STORE.get(tenant_key(META_FRAME), load_meta_df).df)
+        if not missing_month_sessions(month_first, classes_df, sessions.df, calendars, cutoff).empty:
+            # The shared frames can predate sessions appended by the materialize
+            # cron or another replica, or an archive run; re-read both before appending
+            FRAME_STORE.invalidate(tenant_key(SESSIONS_FRAME))
+            FRAME_STORE.invalidate(tenant_key(META_FRAME))
+            sessions = FRAME_STORE.get(tenant_key(SESSIONS_FRAME), load_current_sessions_df)
+            meta = FRAME_STORE.get(tenant_key(META_FRAME), load_meta_df)
+            if ensure_month_sessions_exist(month_first, classes_df=classes_df, sessions_df=sessions.df, calendars=calendars, meta_df=meta.df):
+                FRAME_STORE.invalidate(tenant_key(SESSIONS_FRAME))
+                sessions = FRAME_STORE.get(tenant_key(SESSIONS_FRAME), load_current_sessions_df)
+
+    # The month view is derived once per (month, revision) and shared by all sessions
+    mk = month_key(month_first)
+    with timed("sessions.month_view"):
+        view = FRAME_STORE.derived(sessions, ("month_view", mk), lambda: build_month_view(sessions.df, month_first, sessions.revision))
+
+    st.session_state["sessions_df_full_cache"] = sessions.df
+    st.session_state["sessions_month_view_cache"] = view
+    st.session_state["sessions_data_rev"] = sessions.revision
+    st.session_state["sessions_month_key_cache"] = mk
     st.session_state["sessions_cache_ready"] = True
 
-SESSIONS_TAB = "Sessions"
-SESSIONS_HEADERS = [
-    "session_id",
-    "class_id",
-    "class_name",
-    "session_date",           # YYYY-MM-DD
-    "weekday",                # Mon/Tue...
-    "planned_duration_hours",
-    "actual_duration_hours",  # editable
-    "rate",                   # editable
-    "fee",                    # computed
-    "status",                 # editable
-    "note",                   # editable
-    "created_at_utc",
-    "updated_at_utc",
-]
-
-_WEEKDAY_TO_INT = {"Mon": 0, "Tue": 1, "Wed": 2, "Thu": 3, "Fri": 4, "Sat": 5, "Sun": 6}
-_INT_TO_WEEKDAY = {v: k for k, v in _WEEKDAY_TO_INT.items()}
-
-
-def _parse_rate(x) -> float:
-    if x is None:
-        return 0.0
-    if isinstance(x, (int, float)):
-        return float(x)
-    s = str(x).strip()
-    if not s:
-        return 0.0
-    s = s.replace(",", "")
-    try:
-        return float(s)
-    except Exception:
-        return 0.0
-
-
-def _parse_iso_date(s: str):
-    s = (s or "").strip()
-    if not s:
-        return None
-    try:
-        return date.fromisoformat(s)
-    except Exception:
-        return None
-
-
-def _month_bounds(d: date) -> tuple[date, date]:
-    first = d.replace(day=1)
-    if first.month == 12:
-        next_month = first.replace(year=first.year + 1, month=1, day=1)
-    else:
-        next_month = first.replace(month=first.month + 1, day=1)
-    last = next_month - timedelta(days=1)
-    return first, last
-
-
-def load_sessions_df() -> pd.DataFrame:
-    sh = get_spreadsheet()
-    ws = get_or_create_worksheet(sh, SESSIONS_TAB)
-    ensure_headers(ws, SESSIONS_HEADERS)
-    records = ws.get_all_records()
-    return pd.DataFrame(records) if records else pd.DataFrame(columns=SESSIONS_HEADERS)
-
-
-def append_sessions(rows: list[list]) -> None:
-    if not rows:
-        return
-    sh = get_spreadsheet()
-    ws = get_or_create_worksheet(sh, SESSIONS_TAB)
-    ensure_headers(ws, SESSIONS_HEADERS)
-    ws.append_rows(rows, value_input_option="RAW")
-
-
-def overwrite_sessions_df(df_all: pd.DataFrame) -> None:
-    sh = get_spreadsheet()
-    ws = get_or_create_worksheet(sh, SESSIONS_TAB)
-    ensure_headers(ws, SESSIONS_HEADERS)
-
-    df_all = df_all.copy()
-    for c in SESSIONS_HEADERS:
-        if c not in df_all.columns:
-            df_all[c] = ""
-    df_all = df_all[SESSIONS_HEADERS]
-
-    values = [SESSIONS_HEADERS] + df_all.astype(str).values.tolist()
-    ws.clear()
-    ws.update("A1", values)
-
-
-def _generate_sessions_for_month(classes_df: pd.DataFrame, month_first: date) -> pd.DataFrame:
-    first, last = _month_bounds(month_first)
-    days = pd.date_range(first, last, freq="D")
-
-    out = []
-    now_utc = datetime.now(pytz.UTC).isoformat()
 
-    for _, r in classes_df.iterrows():
-        class_id = str(r.get("class_id", "")).strip()
-        class_name = str(r.get("class_name", "")).strip()
-        rate = _parse_rate(r.get("rate", 0))
-
-        sd = _parse_iso_date(r.get("start_date", ""))
-        ed = _parse_iso_date(r.get("end_date", ""))
-
-        # Your Classes sheet stores week_day and duration_hours as JSON strings
-        try:
-            week_days = json.loads(r.get("week_day", "[]") or "[]")
-        except Exception:
-            week_days = []
-        try:
-            durations = json.loads(r.get("duration_hours", "[]") or "[]")
-        except Exception:
-            durations = []
-
-        schedule = {}
-        for dname, dur in zip(week_days, durations):
-            if dname in _WEEKDAY_TO_INT:
-                try:
-                    schedule[dname] = float(dur)
-                except Exception:
-                    schedule[dname] = 0.0
-
-        if not class_id or not schedule:
-            continue
-
-        for day_ts in days:
-            dt = day_ts.date()
-
-            if sd and dt < sd:
-                continue
-            if ed and dt > ed:
-                continue
-
-            wd = _INT_TO_WEEKDAY.get(dt.weekday())
-            if wd not in schedule:
-                continue
-
-            planned = float(schedule[wd])
-            if planned <= 0:
-                continue
-
-            out.append(
-                {
-                    "session_id": str(uuid.uuid4()),
-                    "class_id": class_id,
-                    "class_name": class_name,
-                    "session_date": dt.isoformat(),
-                    "weekday": wd,
-                    "planned_duration_hours": planned,
-                    "actual_duration_hours": planned,
-                    "rate": rate,
-                    "fee": planned * rate,
-                    "status": "planned",
-                    "note": "",
-                    "created_at_utc": now_utc,
-                    "updated_at_utc": now_utc,
-                }
-            )
-
-    df = pd.DataFrame(out)
-    if df.empty:
-        return pd.DataFrame(columns=SESSIONS_HEADERS)
-    for c in SESSIONS_HEADERS:
-        if c not in df.columns:
-            df[c] = ""
-    return df[SESSIONS_HEADERS]
-
-
-def _ensure_month_sessions_exist(month_first: date) -> None:
-    classes_df = load_classes_df()
-    sessions_df = load_sessions_df()
-
-    planned_df = _generate_sessions_for_month(classes_df, month_first)
-    if planned_df.empty:
-        return
-
-    if sessions_df.empty:
-        existing_keys = set()
-    else:
-        sessions_df["class_id"] = sessions_df["class_id"].astype(str)
-        sessions_df["session_date"] = sessions_df["session_date"].astype(str)
-        existing_keys = set(zip(sessions_df["class_id"], sessions_df["session_date"]))
-
-    to_add = planned_df[
-        ~planned_df.apply(lambda r: (str(r["class_id"]), str(r["session_date"])) in existing_keys, axis=1)
-    ].copy()
-
-    if to_add.empty:
-        return
-
-    append_sessions(to_add.astype(str).values.tolist())
+@timed("ui.get_month_view")
+def get_month_view(month_first: date) -> MonthView:
+    """Return the cached MonthView, rebuilding only if the month or the shared frame's revision moved."""
+    mk = month_key(month_first)
+    # Another session's save or the max-age reload bumps the shared revision
+    current_rev = FRAME_STORE.get(tenant_key(SESSIONS_FRAME), load_current_sessions_df).revision
+    if (
+        not st.session_state.get("sessions_cache_ready")
+        or st.session_state.get("sessions_month_key_cache") != mk
+        or st.session_state.get("sessions_data_rev") != current_rev
+    ):
+        refresh_sessions_cache(month_first)
+    return st.session_state["sessions_month_view_cache"]
 
 # -----------------------------
 # Sheet helpers
 # -----------------------------
 def require_password():
-    if st.session_state.get("authenticated"):
+    # A login is bound to one branch; other branches need their own login
+    if st.session_state.get("authenticated") == current_tenant():
         return
 
+    tenants = list(tenant_sheet_ids())
     with st.form("login"):
+        if len(tenants) > 1:
+            tenant = st.selectbox("Branch", tenants, index=tenants.index(current_tenant()))
+        else:
+            tenant = current_tenant()
         pw = st.text_input("Password", type="password")
         ok = st.form_submit_button("Login")
 
     if not ok:
         st.stop()
 
-    if pw == st.secrets["APP_PASSWORD"]:
-        st.session_state["authenticated"] = True
+    if hmac.compare_digest(pw.encode("utf-8"), tenant_password(tenant).encode("utf-8")):
+        st.session_state[KEY_TENANT] = tenant
+        st.session_state["authenticated"] = tenant
         st.rerun()
     else:
         st.error("Incorrect password")
         st.stop()
 
-require_password()
+# ?profile=1 runs this rerun under cProfile; timings are always collected
+begin_rerun(sample=st.query_params.get("profile") == "1")
+
+init_tenant_from_query()
+
+with timed("auth"):
+    require_password()
 
 
 # -----------------------------
-# Streamlit UI (no st.form; preserves values on Add/Remove)
+# Fragments (independent rerun units)
 # -----------------------------
-tab_classes, tab_sessions = st.tabs(["Classes", "Monthly Sessions"])
+# Widgets inside an @st.fragment only rerun that fragment when touched, so
+# editing a session table does not re-run auth, frame-store reads or the
+# Classes tab.
+# Nothing below may call Sheets except on an explicit Create/Save click.
+
+# Helpers for saving one class at a time
+def _edits_overlay(class_edited: pd.DataFrame) -> pd.DataFrame:
+    """Sessions-sheet values for the edited rows, indexed by session_id."""
+    now_utc = datetime.now(pytz.UTC).isoformat()
+    e = class_edited.set_index(class_edited["session_id"].astype(str))
+
+    def _num(col):
+        return pd.to_numeric(e[col], errors="coerce").fillna(0.0).astype(float)
+
+    def _txt(col):
+        return e[col].fillna("").astype(str)
+
+    return pd.DataFrame(
+        {
+            "session_date": _txt("session_date_iso"),
+            "actual_duration_hours": _num("actual_duration_hours"),
+            "rate": _num("rate"),
+            "status": _txt("status"),
+            "note": _txt("note"),
+            "fee": _num("fee_raw"),  # store raw in sheet
+            "updated_at_utc": now_utc,
+        },
+        index=e.index,
+    )
 
-with tab_classes:
-    # ---- PASTE YOUR CURRENT CLASSES UI HERE (UNCHANGED) ----
+
+def _save_class_changes(class_edited: pd.DataFrame, sessions_df_full: pd.DataFrame) -> None:
+    """
+    class_edited must contain: session_id, session_date_iso, actual_duration_hours, rate, status, note, fee_raw
+    """
+    if class_edited.empty:
+        st.warning("Nothing to save for this class.")
+        return
+
+    if "session_id" not in sessions_df_full.columns:
+        st.error("Sessions sheet is missing 'session_id' column.")
+        return
+
+    overlay = _edits_overlay(class_edited)
+
+    if st.secrets.get("SESSIONS_SAVE_MODE", "overwrite") == "journal":
+        # Append one event per changed field instead of rewriting the tab
+        if record_changes(sessions_df_full, overlay) == 0:
+            st.info("No changes to save for this class.")
+            return
+    else:
+        # Fold exactly the journal events this state includes; later ones survive
+        current, journal = load_current_sessions()
+        overwrite_and_fold(apply_overlay(current, overlay), journal)
+    st.success("Saved changes for this class.")
+
+    # mark cache dirty so next run reloads from Sheets ONCE (for every session)
+    FRAME_STORE.invalidate(tenant_key(SESSIONS_FRAME))
+    st.session_state["sessions_cache_ready"] = False
+    st.rerun()
+
+
+def _unknown_holiday_calendars(names_text: str) -> list[str]:
+    """Names in the comma-separated input that the Holidays tab doesn't define (reads it on Create only)."""
+    names = [n.strip() for n in str(names_text or "").split(",") if n.strip()]
+    if not names:
+        return []
+    holidays = FRAME_STORE.get(tenant_key(HOLIDAYS_FRAME), load_holidays_df)
+    known = FRAME_STORE.derived(holidays, "calendars", lambda: holiday_calendars(holidays.df)).names
+    return [n for n in names if n not in known]
+
+
+@st.fragment
+def _render_class_form():
     # Init
     init_state_if_missing()
     apply_reset_if_marked()
@@ -295,6 +234,22 @@ with tab_classes:
     with c2:
         end_date = st.date_input("End date (optional)", value=None, key="end_date")
 
+    c3, c4, c5 = st.columns(3)
+    with c3:
+        interval_weeks = st.number_input("Repeat every (weeks)", min_value=1, max_value=8, step=1, key="interval_weeks")
+    with c4:
+        holiday_calendar = st.text_input(
+            "Holiday calendar (optional)",
+            key="holiday_calendar",
+            help="Name(s) from the Holidays tab, comma-separated. Those dates are skipped.",
+        )
+    with c5:
+        exception_text = st.text_input(
+            "Skip dates (optional)",
+            key="exception_dates",
+            help="YYYY-MM-DD, comma-separated. No session is generated on these dates.",
+        )
+
     st.markdown("**Schedule** (weekday + duration in hours)")
 
     b1, b2, _ = st.columns([1, 3, 7])
@@ -338,6 +293,12 @@ with tab_classes:
             st.error("Class name is required.")
         elif start_date is not None and end_date is not None and end_date < start_date:
             st.error("End date must be on/after start date.")
+        elif int(interval_weeks) > 1 and start_date is None:
+            st.error("A start date is required when repeating every 2+ weeks; the weeks are counted from it.")
+        elif any(parse_iso_date(x) is None for x in exception_text.split(",") if x.strip()):
+            st.error("Skip dates must be YYYY-MM-DD, comma-separated.")
+        elif unknown_calendars := _unknown_holiday_calendars(holiday_calendar):
+            st.error(f"Unknown holiday calendar(s): {', '.join(unknown_calendars)}. Add them to the Holidays tab first.")
         else:
             week_day = [r["day"] for r in st.session_state["schedule_rows"]]
             duration_hours = [r["duration"] for r in st.session_state["schedule_rows"]]
@@ -363,219 +324,281 @@ with tab_classes:
                     end_date=end_date,
                     week_day=week_day,
                     duration_hours=duration_hours,
+                    interval_weeks=int(interval_weeks),
+                    exception_dates=[parse_iso_date(x) for x in exception_text.split(",") if x.strip()],
+                    holiday_calendar=holiday_calendar,
                 )
                 append_class_to_sheet(new_class)
 
+                FRAME_STORE.invalidate(tenant_key(CLASSES_FRAME))
                 refresh_classes_cache()
 
                 st.success(f"Created: {new_class.class_id} — {new_class.class_name}")
                 st.session_state["_do_reset"] = True
-                st.rerun()
+                # Full rerun so "Existing classes" (outside this fragment) picks up the new row
+                st.rerun(scope="app")
 
-    st.subheader("Existing classes")
-    if not st.session_state.get("classes_cache_ready"):
-        refresh_classes_cache()
 
-    df = st.session_state["classes_df_cache"]
-    preferred_cols = ["class_id", "class_name", "rate", "start_date", "end_date", "schedule", "created_at_utc"]
-    st.dataframe(
-        df[preferred_cols] if (not df.empty and all(c in df.columns for c in preferred_cols)) else df,
-        use_container_width=True,
-    )
+CLASSES_PAGE_SIZES = [25, 50, 100]
+KEY_CLASSES_PAGE = "classes_page"
 
 
-with tab_sessions:
-    st.header("Monthly Sessions")
+def _reset_classes_page():
+    st.session_state[KEY_CLASSES_PAGE] = 1
 
-    # Month picker (defaults to this month)
-    today = date.today()
-    month_first = st.date_input(
-        "Month",
-        value=today.replace(day=1),
-        help="Pick any date in the month; the app uses that month.",
-        key="sessions_month",
-    ).replace(day=1)
 
-    # Ensure Sessions exist for selected month (idempotent)
-    _ensure_month_sessions_exist(month_first)
-    mk = _month_key(month_first)
-    if (
-        not st.session_state.get("sessions_cache_ready")
-        or st.session_state.get("sessions_month_key_cache") != mk
-    ):
-        refresh_sessions_cache(month_first)
-    # Load Sessions + filter to month
-    sessions_df = st.session_state["sessions_df_full_cache"]
-    month_df = st.session_state["sessions_month_df_cache"]
+@st.fragment
+def _render_existing_classes():
+    """Search + filters + one page of the Classes table; reruns on its own."""
+    index: ClassIndex = st.session_state["classes_index_cache"]
 
-    if month_df.empty:
-        st.info("No sessions in this month.")
-        st.stop()
+    c1, c2, c3 = st.columns([3, 1, 1])
+    with c1:
+        query = st.text_input(
+            "Search",
+            key="classes_query",
+            placeholder="ID, name or schedule (e.g. MCT01, toan, wed)",
+            on_change=_reset_classes_page,
+        )
+    with c2:
+        status = st.selectbox("Status", ["All", "Active", "Ended"], key="classes_status", on_change=_reset_classes_page)
+    with c3:
+        page_size = st.selectbox("Rows per page", CLASSES_PAGE_SIZES, key="classes_page_size", on_change=_reset_classes_page)
+
+    active_range = st.date_input(
+        "Running between (optional)",
+        value=(),
+        key="classes_active_range",
+        on_change=_reset_classes_page,
+    )
+    active_from = active_range[0] if len(active_range) > 0 else None
+    active_to = active_range[1] if len(active_range) > 1 else None
 
-    first, last = _month_bounds(month_first)
-    sessions_df["session_date_dt"] = pd.to_datetime(sessions_df["session_date"], errors="coerce")
+    positions = index.search(query, status=status, active_from=active_from, active_to=active_to)
+    pages = max(1, -(-len(positions) // page_size))
+    st.session_state.setdefault(KEY_CLASSES_PAGE, 1)
+    if st.session_state[KEY_CLASSES_PAGE] > pages:
+        st.session_state[KEY_CLASSES_PAGE] = pages
 
-    month_df = sessions_df[
-        (sessions_df["session_date_dt"] >= pd.Timestamp(first))
-        & (sessions_df["session_date_dt"] <= pd.Timestamp(last))
-    ].copy()
+    preferred_cols = ["class_id", "class_name", "rate", "start_date", "end_date", "schedule", "created_at_utc"]
+    # Only the current page is sent to the browser
+    st.dataframe(index.page(positions, st.session_state[KEY_CLASSES_PAGE], page_size, preferred_cols), use_container_width=True)
+
+    p1, p2 = st.columns([1, 4])
+    with p1:
+        st.number_input("Page", min_value=1, max_value=pages, step=1, key=KEY_CLASSES_PAGE)
+    with p2:
+        st.caption(f"{len(positions)} of {len(index.df)} classes · {pages} page(s)")
+
+
+@timed("ui.class_editor")
+def _render_class_editor(group: ClassGroup, sessions_df: pd.DataFrame) -> tuple[int, float, float]:
+    """
+    One class table + its Save button; returns its (sessions, hours, fee_raw)
+    as currently edited. `group` comes from the cached MonthView
+    (fee_raw/fee_display already computed).
+    """
+    saved = (group.sessions, group.hours, group.fee_raw)
+    cid = group.class_id
+    session_ids = group.session_ids
+
+    st.subheader(f"{cid} — {group.class_name}")
+
+    edited_g = st.data_editor(
+        group.editor_df,
+        use_container_width=True,
+        num_rows="fixed",
+        disabled=["weekday", "fee_display"],  # session_date editable
+        column_config={
+            "session_date": st.column_config.DateColumn("Session date"),
+            "actual_duration_hours": st.column_config.NumberColumn("Actual (hours)", format="%.2f"),
+            "rate": st.column_config.NumberColumn("Rate", format="%.2f"),
+            "fee_display": st.column_config.TextColumn("Fee"),
+            "status": st.column_config.TextColumn("Status"),
+            "note": st.column_config.TextColumn("Note"),
+        },
+        hide_index=True,
+        key=f"sessions_editor_{cid}",
+    )
 
-    if month_df.empty:
-        st.info("No sessions in this month.")
-        st.stop()
+    # Reattach session_id by row order
+    edited_g = edited_g.copy()
+    if len(edited_g) != len(session_ids):
+        st.error("Row count changed; cannot map edits back to session IDs.")
+        return saved
 
-    # Normalize numeric fields
-    month_df["actual_duration_hours"] = pd.to_numeric(month_df["actual_duration_hours"], errors="coerce").fillna(0.0)
-    month_df["rate"] = pd.to_numeric(month_df["rate"], errors="coerce").fillna(0.0)
+    edited_g.insert(0, "session_id", session_ids)
 
-    # Make session_date editable as proper date type in editor
-    month_df["session_date"] = pd.to_datetime(month_df["session_date"], errors="coerce").dt.date
+    # Normalize edited values
+    edited_g["actual_duration_hours"] = pd.to_numeric(edited_g["actual_duration_hours"], errors="coerce").fillna(0.0)
+    edited_g["rate"] = pd.to_numeric(edited_g["rate"], errors="coerce").fillna(0.0)
 
-    # We show fee_display (string), compute fee_raw (numeric) for save + totals
-    show_cols = ["session_date", "weekday", "actual_duration_hours", "rate", "fee_display", "status", "note"]
+    edited_g["session_date"] = pd.to_datetime(edited_g["session_date"], errors="coerce").dt.date
+    if edited_g["session_date"].isna().any():
+        st.error("Invalid session_date detected. Please fix the date values.")
+        return saved
+    edited_g["session_date_iso"] = edited_g["session_date"].map(lambda d: d.isoformat())
 
-    # Helpers for saving one class at a time
-    def _format_fee_display(fee_raw_series: pd.Series) -> pd.Series:
-        fee_vnd = (pd.to_numeric(fee_raw_series, errors="coerce").fillna(0.0) * 1000).round(0).astype(int)
-        return fee_vnd.map(lambda x: f"{x:,}")
+    # Recompute fees
+    edited_g["fee_raw"] = edited_g["actual_duration_hours"] * edited_g["rate"]
 
-    def _save_class_changes(class_edited: pd.DataFrame, sessions_df_full: pd.DataFrame) -> None:
-        """
-        class_edited must contain: session_id, session_date_iso, actual_duration_hours, rate, status, note, fee_raw
-        """
-        if class_edited.empty:
-            st.warning("Nothing to save for this class.")
-            return
+    # Save button directly under this table (per class)
+    if st.button("Save changes", type="primary", key=f"save_class_{cid}"):
+        _save_class_changes(
+            class_edited=edited_g[["session_id", "session_date_iso", "actual_duration_hours", "rate", "status", "note", "fee_raw"]].copy(),
+            sessions_df_full=sessions_df,
+        )
 
-        full = sessions_df_full.copy()
-        if "session_id" not in full.columns:
-            st.error("Sessions sheet is missing 'session_id' column.")
-            return
+    st.divider()
 
-        full["session_id"] = full["session_id"].astype(str)
+    # For monthly totals across all classes
+    return (
+        int(len(edited_g)),
+        float(edited_g["actual_duration_hours"].sum()),
+        float(edited_g["fee_raw"].sum()),
+    )
 
-        now_utc = datetime.now(pytz.UTC).isoformat()
-        update_map = (
-            class_edited.set_index("session_id")[["session_date_iso", "actual_duration_hours", "rate", "status", "note", "fee_raw"]]
-            .to_dict("index")
-        )
 
-        def _apply_row(row):
-            sid = str(row.get("session_id", ""))
-            if sid in update_map:
-                row["session_date"] = str(update_map[sid].get("session_date_iso", row.get("session_date", "")) or "")
-                row["actual_duration_hours"] = float(update_map[sid].get("actual_duration_hours", row.get("actual_duration_hours", 0)) or 0)
-                row["rate"] = float(update_map[sid].get("rate", row.get("rate", 0)) or 0)
-                row["status"] = str(update_map[sid].get("status", row.get("status", "")) or "")
-                row["note"] = str(update_map[sid].get("note", row.get("note", "")) or "")
-                row["fee"] = float(update_map[sid].get("fee_raw", 0) or 0)  # store raw in sheet
-                row["updated_at_utc"] = now_utc
-            return row
-
-        full = full.apply(_apply_row, axis=1)
-
-        for c in SESSIONS_HEADERS:
-            if c not in full.columns:
-                full[c] = ""
-        full = full[SESSIONS_HEADERS]
-
-        overwrite_sessions_df(full)
-        st.success("Saved changes for this class.")
-
-        # mark cache dirty so next run reloads from Sheets ONCE
-        st.session_state["sessions_cache_ready"] = False
-        st.rerun()
+@timed("ui.month_totals")
+def _render_month_totals(subtotals: list[tuple[int, float, float]]):
+    """Sums the editors' current subtotals; no pandas or Sheets work."""
+    total_sessions = sum(s for s, _, _ in subtotals)
+    total_hours = sum(h for _, h, _ in subtotals)
+    total_fee = sum(f for _, _, f in subtotals) * 1000
 
-    # ---- Render per-class tables with per-table Save button ----
-    edited_all_for_totals = []
-    grouped = month_df.groupby(["class_id", "class_name"], sort=True)
-
-    for (cid, cname), g in grouped:
-        g = g.copy()
-
-        if "session_id" not in g.columns:
-            st.error("Sessions sheet is missing 'session_id' column.")
-            st.stop()
-
-        session_ids = g["session_id"].astype(str).tolist()
-
-        # Compute fee display (fee_raw * 1000 with commas)
-        g["fee_raw"] = g["actual_duration_hours"] * g["rate"]
-        g["fee_display"] = _format_fee_display(g["fee_raw"])
-
-        st.subheader(f"{cid} — {cname}")
-
-        editor_df = g[show_cols].copy()  # session_id hidden
-
-        edited_g = st.data_editor(
-            editor_df,
-            use_container_width=True,
-            num_rows="fixed",
-            disabled=["weekday", "fee_display"],  # session_date editable
-            column_config={
-                "session_date": st.column_config.DateColumn("Session date"),
-                "actual_duration_hours": st.column_config.NumberColumn("Actual (hours)", format="%.2f"),
-                "rate": st.column_config.NumberColumn("Rate", format="%.2f"),
-                "fee_display": st.column_config.TextColumn("Fee"),
-                "status": st.column_config.TextColumn("Status"),
-                "note": st.column_config.TextColumn("Note"),
-            },
-            hide_index=True,
-            key=f"sessions_editor_{cid}",
-        )
+    st.subheader("Monthly Total")
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Sessions", total_sessions)
+    c2.metric("Total hours", round(total_hours, 2))
+    c3.metric("Total fee", f"{int(round(total_fee)):,}")
 
-        # Reattach session_id by row order
-        edited_g = edited_g.copy()
-        if len(edited_g) != len(session_ids):
-            st.error("Row count changed; cannot map edits back to session IDs.")
-            st.stop()
 
-        edited_g.insert(0, "session_id", session_ids)
+@st.fragment
+@timed("ui.month_editors", fragment=True)
+def _render_month_editors(view: MonthView, sessions_df: pd.DataFrame):
+    """
+    Every class table plus the month totals, as one rerun unit: an edit in
+    any table reruns only this (no auth, frame-store reads or Sheets I/O),
+    and the totals always reflect the tables drawn in the same run. `view`
+    and `sessions_df` are captured on the last full run.
+    """
+    subtotals = [_render_class_editor(grp, sessions_df) for grp in view.groups]
+    _render_month_totals(subtotals)
 
-        # Normalize edited values
-        edited_g["actual_duration_hours"] = pd.to_numeric(edited_g["actual_duration_hours"], errors="coerce").fillna(0.0)
-        edited_g["rate"] = pd.to_numeric(edited_g["rate"], errors="coerce").fillna(0.0)
 
-        edited_g["session_date"] = pd.to_datetime(edited_g["session_date"], errors="coerce").dt.date
-        if edited_g["session_date"].isna().any():
-            st.error("Invalid session_date detected. Please fix the date values.")
-            st.stop()
-        edited_g["session_date_iso"] = edited_g["session_date"].map(lambda d: d.isoformat())
+# -----------------------------
+# Streamlit UI (no st.form; preserves values on Add/Remove)
+# -----------------------------
+# (tenant, view key, zip path) of the last built statements; the zip stays on disk
+KEY_STATEMENTS = "statements_zip"
 
-        # Recompute fees
-        edited_g["fee_raw"] = edited_g["actual_duration_hours"] * edited_g["rate"]
-        edited_g["fee_display"] = _format_fee_display(edited_g["fee_raw"])
 
-        # Keep for monthly totals across all classes
-        edited_all_for_totals.append(edited_g[["session_id", "actual_duration_hours", "fee_raw"]].copy())
+def _drop_statements():
+    built = st.session_state.pop(KEY_STATEMENTS, None)
+    if built:
+        try:
+            os.remove(built[2])
+        except OSError:
+            pass
+
+
+def _on_tenant_change():
+    # Session-level references belong to the previous branch's spreadsheet
+    for k in ("classes_cache_ready", "sessions_cache_ready"):
+        st.session_state[k] = False
+    _drop_statements()
+
+
+def _switch_branch():
+    # Back to the login form; the next branch needs its own password
+    st.session_state.pop("authenticated", None)
+    _on_tenant_change()
+
+
+with st.sidebar:
+    if len(tenant_sheet_ids()) > 1:
+        st.caption(f"Branch: {current_tenant()}")
+        st.button("Switch branch", on_click=_switch_branch)
+
+    # Computed only on demand: deep memory_usage walks every object column
+    if st.toggle("Memory report", key="show_memory_report"):
+        mem = memory_report(st.session_state)
+        shared_mb = mem.loc[mem["shared"], "bytes"].sum() / 1e6
+        private_mb = mem.loc[~mem["shared"], "bytes"].sum() / 1e6
+        st.caption(f"This session: {private_mb:.2f} MB private, {shared_mb:.2f} MB shared (paid once per process)")
+        st.dataframe(mem, hide_index=True, use_container_width=True)
+
+    if st.toggle("Profiling", key="show_profiling"):
+        stats = phase_stats()
+        if stats:
+            st.caption("Per-phase wall time since process start (last 2000 samples each)")
+            st.dataframe(pd.DataFrame(stats), hide_index=True, use_container_width=True)
+        else:
+            st.caption("No timings yet.")
+        last = st.session_state.get(KEY_LAST_CPROFILE)
+        if last:
+            with st.expander("Last cProfile run (?profile=1)"):
+                st.code(last, language=None)
 
-        # Save button directly under this table (per class)
-        if st.button("Save changes", type="primary", key=f"save_class_{cid}"):
-            _save_class_changes(
-                class_edited=edited_g[["session_id", "session_date_iso", "actual_duration_hours", "rate", "status", "note", "fee_raw"]].copy(),
-                sessions_df_full=sessions_df,
-            )
+tab_classes, tab_sessions = st.tabs(["Classes", "Monthly Sessions"])
 
-        st.divider()
+with tab_classes:
+    _render_class_form()
 
-    # ---- Overall aggregate at top (based on current edited values) ----
-    # Note: this will render AFTER the tables. If you want it at the very top,
-    # we can compute a "best effort" total from month_df before editing instead.
-    if edited_all_for_totals:
-        all_totals_df = pd.concat(edited_all_for_totals, ignore_index=True)
-        total_sessions = int(len(all_totals_df))
-        total_hours = float(pd.to_numeric(all_totals_df["actual_duration_hours"], errors="coerce").fillna(0.0).sum())
-        total_fee = float(pd.to_numeric(all_totals_df["fee_raw"], errors="coerce").fillna(0.0).sum() * 1000)
-    else:
-        total_sessions, total_hours, total_fee = 0, 0.0, 0.0
+    st.subheader("Existing classes")
+    if not st.session_state.get("classes_cache_ready"):
+        refresh_classes_cache()
 
-    st.subheader("Monthly Total")
-    c1, c2, c3 = st.columns(3)
-    c1.metric("Sessions", total_sessions)
-    c2.metric("Total hours", round(total_hours, 2))
-    c3.metric("Total fee", f"{int(round(total_fee)):,}")
+    _render_existing_classes()
 
 
+with tab_sessions:
+    st.header("Monthly Sessions")
 
+    # Month picker (defaults to this month)
+    today = date.today()
+    month_first = st.date_input(
+        "Month",
+        value=today.replace(day=1),
+        help="Pick any date in the month; the app uses that month.",
+        key="sessions_month",
+    ).replace(day=1)
 
+    # Sessions for the month are materialized inside refresh_sessions_cache,
+    # so Sheets is only hit when the month changes or after a save.
+    view = get_month_view(month_first)
+    sessions_df = st.session_state["sessions_df_full_cache"]
 
+    # No st.stop() here so end_rerun() below still runs
+    if view.empty:
+        st.info("No sessions in this month.")
+    elif "session_id" not in view.frame.columns:
+        st.error("Sessions sheet is missing 'session_id' column.")
+    else:
+        # ---- Per-class tables (Save button under each) + overall aggregate ----
+        _render_month_editors(view, sessions_df)
+
+        # ---- Month-end statements (saved values, not unsaved edits) ----
+        with st.expander("Fee statements"):
+            # Revisions are counted per branch, so the view key alone can collide
+            tenant = current_tenant()
+            if st.button("Build statements (CSV + PDF per class)", key="build_statements_btn"):
+                _drop_statements()
+                with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as tmp:
+                    # In-process: a spawn pool would re-run this script in every child
+                    result = export_statements_zip(view, tmp, workers=1)
+                st.session_state[KEY_STATEMENTS] = (tenant, view.key, tmp.name)
+                st.caption(str(result))
+            built = st.session_state.get(KEY_STATEMENTS)
+            if built and built[:2] == (tenant, view.key) and os.path.exists(built[2]):
+                with open(built[2], "rb") as f:
+                    st.download_button(
+                        "Download zip",
+                        data=f,
+                        file_name=f"statements-{view.month_key}.zip",
+                        mime="application/zip",
+                        key="download_statements_btn",
+                        on_click=_drop_statements,  # one download per build; frees the file
+                    )
+
+end_rerun()